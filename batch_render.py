@@ -0,0 +1,130 @@
+"""Pre-render every player's views for every match in Matches/.
+
+Run `python batch_render.py` before match-day traffic. Figures are drawn headless
+with the Agg backend in a process pool, written under prerendered/, and listed in
+prerendered/manifest.json, which the app checks before rendering live. Matches whose
+CSV hash, renderer version and heat-map style are unchanged since the last run, and
+whose views all rendered, are skipped; views that failed are tried again.
+"""
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import heatmap
+from match_loader import file_hash, load_event_index, load_match, load_territories
+from render_cache import ACTION_FILTERS, PRERENDER_DIR, STYLE_VERSION, image_name, load_manifest
+
+MATCHES_DIR = "Matches"
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+
+
+def match_players(file_path):
+    df = load_match(file_path)
+    for team in df['teamName'].dropna().unique():
+        for player in df.loc[df['teamName'] == team, 'playerName'].dropna().unique():
+            yield team, player
+
+
+def render_player(file_path, team, player, output_dir):
+    """Worker task: draw all views of one player; returns (manifest entries, {failed view: error})."""
+    import pitch_views
+
+    events = load_event_index(file_path).player(player)
+    player_rows = events.all()
+    player_position = player_rows['Position'].iloc[0] if len(player_rows) else None
+    images, failures = {}, {}
+    for action_filter in ACTION_FILTERS:
+        view = "|".join([team, player, action_filter])
+        try:
+            png = pitch_views.render_png(events, action_filter, player_position, load_territories(file_path).get(player))
+        except Exception as error:
+            # Left out of the images, so the app renders (and reports) it live.
+            failures[view] = repr(error)
+            continue
+        name = image_name(file_hash(file_path), team, player, action_filter)
+        path = os.path.join(output_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+        images[view] = name
+    return images, failures
+
+
+def is_current(entry, csv_hash, output_dir):
+    return (
+        entry is not None
+        and entry.get('csv_hash') == csv_hash
+        and entry.get('renderer_version') == STYLE_VERSION
+        and entry.get('heatmap_style') == heatmap.HEATMAP_STYLE
+        # Entries from before failures were recorded count as stale.
+        and 'failed' in entry and not entry['failed']
+        and all(os.path.exists(os.path.join(output_dir, name)) for name in entry['images'].values())
+    )
+
+
+def write_manifest(manifest, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    path = os.path.join(output_dir, "manifest.json")
+    with open(path + ".tmp", 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(path + ".tmp", path)
+
+
+def run(matches_dir=MATCHES_DIR, output_dir=PRERENDER_DIR, workers=None, force=False):
+    previous = (load_manifest(output_dir) or {}).get('matches', {})
+    match_files = sorted(name for name in os.listdir(matches_dir) if name.endswith(".csv"))
+    # Matches whose CSV has been removed are dropped from the manifest.
+    manifest = {'matches': {name: entry for name, entry in previous.items() if name in match_files}}
+
+    pending = {}
+    for name in match_files:
+        file_path = os.path.join(matches_dir, name)
+        csv_hash = file_hash(file_path)
+        if not force and is_current(manifest['matches'].get(name), csv_hash, output_dir):
+            continue
+        pending[name] = {'csv_hash': csv_hash, 'renderer_version': STYLE_VERSION, 'heatmap_style': heatmap.HEATMAP_STYLE,
+                         'images': {}, 'failed': {}}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = {}
+        for name in pending:
+            file_path = os.path.join(matches_dir, name)
+            for team, player in match_players(file_path):
+                futures[pool.submit(render_player, file_path, team, player, output_dir)] = name
+        remaining = {name: 0 for name in pending}
+        for name in futures.values():
+            remaining[name] += 1
+        for future in as_completed(futures):
+            name = futures[future]
+            images, failures = future.result()
+            pending[name]['images'].update(images)
+            pending[name]['failed'].update(failures)
+            for view, error in failures.items():
+                print(f"Skipped {name}: {view}: {error}")
+            remaining[name] -= 1
+            if remaining[name] == 0:
+                # Publish each match as soon as all its players are done.
+                manifest['matches'][name] = pending[name]
+                write_manifest(manifest, output_dir)
+                print(f"Rendered {len(pending[name]['images'])} images for {name}")
+
+    write_manifest(manifest, output_dir)
+    return len(pending), len(match_files) - len(pending)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render every player view for every match.")
+    parser.add_argument("--matches-dir", default=MATCHES_DIR)
+    parser.add_argument("--output", default=PRERENDER_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--force", action="store_true", help="re-render matches that are already up to date")
+    args = parser.parse_args()
+    rendered, skipped = run(args.matches_dir, args.output, args.workers, args.force)
+    print(f"Rendered {rendered} matches, skipped {skipped} unchanged")
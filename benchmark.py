@@ -0,0 +1,271 @@
+"""Time each stage of loading and rendering a match, headless, against the real Matches/ files.
+
+    python benchmark.py                          # Match 163, all views, outfield and goalkeeper
+    python benchmark.py --save baseline.json     # keep the results as a baseline
+    python benchmark.py --compare baseline.json  # exit 1 if a stage got slower than the baseline
+    python benchmark.py --sessions 10            # memory each extra app session keeps alive
+
+Loading is split into CSV parse, qualifier decoding, the season store read and the event
+index. Each view is split into subset filters, heat map, figure setup, the remaining
+arrow/scatter drawing and PNG encoding. Every stage reports p50/p95 over --repeat runs;
+every case also reports the peak Python heap (tracemalloc) of one extra, traced run.
+Nothing is read from or written to the render caches.
+
+--sessions runs the app itself (Streamlit's AppTest) once to warm the shared caches and
+then N more times, and reports the heap each extra session still holds afterwards.
+"""
+import argparse
+import gc
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import matplotlib
+matplotlib.use("Agg")
+
+import numpy as np
+import pandas as pd
+
+import heatmap
+import match_loader
+import pitch_views
+import season_store
+from event_index import EventIndex
+from pitch_template import background, pitch_figure
+from render_cache import ACTION_FILTERS
+
+MATCHES_DIR = "Matches"
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_project.py")
+DEFAULT_MATCH = "Match 163 - Final - Mohun Bagan SG 2-1 Bengaluru FC"
+# Stages faster than this are reported but never flagged; their noise is larger than any regression.
+NOISE_FLOOR_MS = 2.0
+
+
+class Stopwatch:
+    def __init__(self):
+        self.times = {}
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.times[name] = self.times.get(name, 0.0) + seconds
+
+
+class TimedEvents:
+    """Wraps PlayerEvents so the time spent selecting subsets is counted separately."""
+
+    def __init__(self, events, watch):
+        self._events = events
+        self._watch = watch
+        self.key = events.key
+
+    def all(self):
+        with self._watch.stage('filters'):
+            return self._events.all()
+
+    def type(self, type_id, outcome=None):
+        with self._watch.stage('filters'):
+            return self._events.type(type_id, outcome=outcome)
+
+    def flag(self, flag):
+        with self._watch.stage('filters'):
+            return self._events.flag(flag)
+
+
+@contextmanager
+def timed_heatmap(watch):
+    draw = heatmap.draw
+
+    def timed_draw(*args, **kwargs):
+        with watch.stage('heatmap'):
+            return draw(*args, **kwargs)
+
+    heatmap.draw = timed_draw
+    try:
+        yield
+    finally:
+        heatmap.draw = draw
+
+
+def load_stages(file_path):
+    watch = Stopwatch()
+    with watch.stage('csv_parse'):
+        raw = pd.read_csv(file_path, low_memory=False)
+    with watch.stage('decode'):
+        df, _ = match_loader.decode(raw)
+    if os.path.exists(season_store.STORE_PATH):
+        with watch.stage('store_read'):
+            season_store.read_match(file_path)
+    with watch.stage('index'):
+        EventIndex(df, match_loader.file_hash(file_path))
+    return watch.times
+
+
+def render_stages(events, action_filter, player_position):
+    """One uncached render_png, timed stage by stage."""
+    watch = Stopwatch()
+    heatmap._densities.clear()
+    with timed_heatmap(watch):
+        start = time.perf_counter()
+        with pitch_figure() as (pitch, fig, ax):
+            watch.add('figure', time.perf_counter() - start)
+            with watch.stage('draw'):
+                pitch_views.draw_view(pitch, fig, ax, TimedEvents(events, watch), action_filter, player_position)
+            with watch.stage('encode'):
+                fig.savefig(io.BytesIO(), format='png', bbox_inches='tight', dpi=200)
+    times = watch.times
+    # 'draw' includes the filters and heat map it called; keep only the drawing itself.
+    times['draw'] -= times.get('filters', 0.0) + times.get('heatmap', 0.0)
+    times['total'] = sum(times.values())
+    return times
+
+
+def peak_kib(function, *args):
+    tracemalloc.start()
+    try:
+        function(*args)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def app_session(view):
+    """One session of the app, on its default match, showing the selected player's view."""
+    from streamlit.testing.v1 import AppTest
+
+    session = AppTest.from_file(APP, default_timeout=600).run()
+    next(button for button in session.button if button.label == view).click().run()
+    if session.exception:
+        raise RuntimeError(session.exception[0].value)
+    return session
+
+
+def session_memory(sessions, view=ACTION_FILTERS[0]):
+    """KiB of heap each extra session keeps alive: (total, allocated from this repository's code).
+
+    The rest of the total is Streamlit's own per-session state and the test harness.
+    """
+    kept = [app_session(view)]
+    gc.collect()
+    tracemalloc.start(32)
+    try:
+        before = tracemalloc.take_snapshot()
+        kept += [app_session(view) for _ in range(sessions)]
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    repo, this_file = os.path.dirname(APP), os.path.abspath(__file__)
+    total = own = 0
+    for stat in after.compare_to(before, 'traceback'):
+        total += stat.size_diff
+        # Every allocation passes through this file's app_session(); count those the app's modules made.
+        if any(os.path.dirname(frame.filename) == repo and frame.filename != this_file for frame in stat.traceback):
+            own += stat.size_diff
+    return total / sessions / 1024, own / sessions / 1024
+
+
+def summarize(runs):
+    stages = {}
+    for name in runs[0]:
+        ms = np.array([run[name] for run in runs]) * 1000
+        stages[name] = {'p50_ms': round(float(np.percentile(ms, 50)), 3), 'p95_ms': round(float(np.percentile(ms, 95)), 3)}
+    return stages
+
+
+def pick_players(file_path):
+    """The busiest outfield player and the busiest goalkeeper of the match."""
+    df = match_loader.load_match(file_path)
+    players = df.dropna(subset=['playerName'])
+    picked = {}
+    for player in players['playerName'].value_counts().index:
+        # The app takes the position from the player's first event, so do the same.
+        position = players.loc[players['playerName'] == player, 'Position'].iloc[0]
+        position = None if pd.isna(position) else position
+        picked.setdefault('goalkeeper' if position == 'Goalkeeper' else 'outfield', (player, position))
+    return picked
+
+
+def run(match_names, views=ACTION_FILTERS, repeat=5, matches_dir=MATCHES_DIR):
+    background()
+    results = {}
+    for name in match_names:
+        file_path = os.path.join(matches_dir, f"{name}.csv")
+        load_stages(file_path)
+        results[f"{name} | load"] = {
+            'stages': summarize([load_stages(file_path) for _ in range(repeat)]),
+            'peak_kib': round(peak_kib(load_stages, file_path)),
+        }
+        index = match_loader.load_event_index(file_path)
+        for role, (player, position) in sorted(pick_players(file_path).items()):
+            events = index.player(player)
+            for view in views:
+                peak = peak_kib(render_stages, events, view, position)
+                results[f"{name} | {role} | {view}"] = {
+                    'player': player,
+                    'stages': summarize([render_stages(events, view, position) for _ in range(repeat)]),
+                    'peak_kib': round(peak),
+                }
+    return results
+
+
+def report(results):
+    for case, result in results.items():
+        stages = ", ".join(f"{stage} {t['p50_ms']:.1f}/{t['p95_ms']:.1f}" for stage, t in result['stages'].items())
+        print(f"{case}: {stages} ms (p50/p95); peak {result['peak_kib']:,} KiB")
+
+
+def compare(results, baseline, threshold):
+    """Lines describing every stage whose p50 grew by more than threshold over the baseline."""
+    slower = []
+    for case, result in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        for stage, timing in result['stages'].items():
+            old = before['stages'].get(stage)
+            if old is None or timing['p50_ms'] < NOISE_FLOOR_MS:
+                continue
+            if timing['p50_ms'] > old['p50_ms'] * threshold:
+                slower.append(f"{case} | {stage}: {old['p50_ms']:.1f} -> {timing['p50_ms']:.1f} ms")
+    return slower
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark loading and rendering of match views.")
+    parser.add_argument("--match", action="append", help=f"match name without .csv (default: {DEFAULT_MATCH})")
+    parser.add_argument("--view", action="append", choices=ACTION_FILTERS, help="views to render (default: all)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--heatmap-style", choices=["grid", "kde"], default=heatmap.HEATMAP_STYLE, help="time the binned grid or the old pitch.kdeplot")
+    parser.add_argument("--save", metavar="JSON", help="write the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="baseline to compare against")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed p50 ratio over the baseline")
+    parser.add_argument("--sessions", type=int, default=0, help="also measure the memory kept per app session over this many sessions")
+    args = parser.parse_args()
+
+    heatmap.HEATMAP_STYLE = args.heatmap_style
+    results = run(args.match or [DEFAULT_MATCH], args.view or ACTION_FILTERS, args.repeat)
+    report(results)
+    if args.sessions:
+        view = (args.view or ACTION_FILTERS)[0]
+        total, own = session_memory(args.sessions, view)
+        print(f"{args.sessions} app sessions | {view}: {total:,.1f} KiB kept per session, {own:,.1f} KiB of it by the app's code")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=1, ensure_ascii=False)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            slower = compare(results, json.load(f), args.threshold)
+        for line in slower:
+            print(f"SLOWER {line}")
+        sys.exit(1 if slower else 0)
@@ -0,0 +1,130 @@
+import numpy as np
+
+from cache import read_only
+from timeline import Timeline, clock_order
+
+FLAG_COLUMNS = ['keyPass', 'assist', 'own_goal', 'long_ball', 'cross', 'head_pass', 'through_ball', 'free_kick', 'corner']
+
+
+def _offsets(sorted_keys):
+    """Map each distinct key of an already sorted array to its (start, stop) block."""
+    if len(sorted_keys) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+    stops = np.r_[starts[1:], len(sorted_keys)]
+    return dict(zip(sorted_keys[starts].tolist(), zip(starts.tolist(), stops.tolist())))
+
+
+def _slice(rows, ranks, block, window, sorted_blocks=None):
+    """The rows of a block, or only those whose timeline rank falls inside one of the window's ranges.
+
+    sorted_blocks splits the block into parts whose ranks are each sorted, when the block's are not.
+    """
+    if not block:
+        return rows[:0]
+    start, stop = block
+    if window is None:
+        return rows[start:stop]
+    parts = []
+    for start, stop in sorted_blocks or [block]:
+        block_ranks = ranks[start:stop]
+        parts += [rows[start + np.searchsorted(block_ranks, lo):start + np.searchsorted(block_ranks, hi)] for lo, hi in window]
+    return np.concatenate(parts) if parts else rows[:0]
+
+
+class EventIndex:
+    """Row positions of one match grouped by (player, typeId, outcome) in a single sort.
+
+    Rows are ordered by player, then typeId, then outcome, and by game clock inside each
+    group, so a player's rows of one type and a player's rows of one type and outcome
+    are each one contiguous block; a second order by player alone does the same for all
+    of a player's rows. The part of a block inside a time window (see timeline.py) is
+    found by binary search on the timeline ranks of the block.
+    """
+
+    def __init__(self, df, key=None):
+        # key identifies the match version (the loader passes the file hash) for derived caches.
+        self.key = key
+        self.df = df
+        self.players = df['playerName'].cat.categories
+        # -1 (no player) becomes 0 so every key is non-negative.
+        player = df['playerName'].cat.codes.to_numpy().astype('int64') + 1
+        type_id = df['typeId'].to_numpy().astype('int64')
+        outcome = df['outcome'].to_numpy().astype('int64')
+        keys = (player << 16) | (type_id << 8) | outcome
+
+        # Sorting the clock-ordered rows stably keeps every block in clock order.
+        self.timeline = Timeline(df, clock_order(df))
+        by_clock = self.timeline.order
+        self.order = by_clock[np.argsort(keys[by_clock], kind='stable')]
+        self.ranks = self.timeline.ranks[self.order]
+        sorted_keys = keys[self.order]
+        self._by_type = _offsets(sorted_keys >> 8)
+        self._by_outcome = _offsets(sorted_keys)
+        # A type's block holds one clock-ordered run per outcome.
+        self._outcome_blocks = {}
+        for key, block in self._by_outcome.items():
+            self._outcome_blocks.setdefault(key >> 8, []).append(block)
+        # A player's block above is ordered by type first, so whole-player lookups get their own clock-ordered copy.
+        self.player_order = by_clock[np.argsort(player[by_clock], kind='stable')]
+        self.player_ranks = self.timeline.ranks[self.player_order]
+        self._by_player = _offsets(player[self.player_order])
+
+        self._flags = {}
+        for col in FLAG_COLUMNS:
+            if col not in df.columns:
+                continue
+            rows = np.flatnonzero(df[col].to_numpy() == 1)
+            rows = rows[np.lexsort((self.timeline.ranks[rows], player[rows]))].astype('int32')
+            self._flags[col] = (read_only(rows), read_only(self.timeline.ranks[rows]), _offsets(player[rows]))
+        read_only(self.order, self.ranks, self.player_order, self.player_ranks)
+
+    def player_code(self, player):
+        if player is None or player not in self.players:
+            return None
+        return self.players.get_loc(player) + 1
+
+    def rows(self, player, type_id=None, outcome=None, window=None):
+        code = self.player_code(player)
+        if code is None:
+            return self.order[:0]
+        if type_id is None:
+            return _slice(self.player_order, self.player_ranks, self._by_player.get(code), window)
+        if outcome is None:
+            key = (code << 8) | int(type_id)
+            return _slice(self.order, self.ranks, self._by_type.get(key), window, self._outcome_blocks.get(key))
+        block = self._by_outcome.get((code << 16) | (int(type_id) << 8) | int(outcome))
+        return _slice(self.order, self.ranks, block, window)
+
+    def flag_rows(self, player, flag, window=None):
+        code = self.player_code(player)
+        rows, ranks, offsets = self._flags.get(flag, (self.order[:0], self.ranks[:0], {}))
+        return _slice(rows, ranks, offsets.get(code), window)
+
+    def player(self, player, window=None):
+        """window is a tuple of timeline rank ranges from Timeline.window(); None means the whole match."""
+        return PlayerEvents(self, player, window)
+
+    @property
+    def nbytes(self):
+        return (self.order.nbytes + self.ranks.nbytes + self.player_order.nbytes + self.player_ranks.nbytes + self.timeline.nbytes
+                + sum(rows.nbytes + ranks.nbytes for rows, ranks, _ in self._flags.values()))
+
+
+class PlayerEvents:
+    """One player's view of an EventIndex, returning the matching rows of the match frame."""
+
+    def __init__(self, index, player, window=None):
+        self.index = index
+        self.name = player
+        self.window = window
+        self.key = (index.key, player) if window is None else (index.key, player, window)
+
+    def all(self):
+        return self.index.df.take(np.sort(self.index.rows(self.name, window=self.window)))
+
+    def type(self, type_id, outcome=None):
+        return self.index.df.take(self.index.rows(self.name, type_id, outcome, self.window))
+
+    def flag(self, flag):
+        return self.index.df.take(self.index.flag_rows(self.name, flag, self.window))
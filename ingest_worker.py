@@ -0,0 +1,182 @@
+"""Background ingest of match files dropped into Matches/ while the app is running.
+
+One daemon thread per directory polls it for new or changed CSV files. A file is taken
+once its size and mtime have held still for a poll, so half-copied files are left alone.
+Its header is checked against the expected event and qualifier/N/* layout, it is decoded
+into the match cache with its event index, timeline, territories and starters, its season
+partial is written, and the popular views are rendered into the render cache. Only then is it
+published: the app lists matches through load_index(ready=worker.ready), which leaves
+out every file the worker has not published yet. Files that were already there when
+the worker started count as published. A file that fails is logged and skipped until it
+changes again.
+"""
+import logging
+import os
+import re
+import threading
+
+import pandas as pd
+
+import match_index
+import match_loader
+import render_cache
+import season
+
+MATCHES_DIR = "Matches"
+ENABLED = os.environ.get("ISL_INGEST", "1") not in ("0", "false", "no")
+POLL_SECONDS = float(os.environ.get("ISL_INGEST_POLL_SECONDS", "10"))
+# Rendered ahead of the first visitor for every starter, next to each team's territory view.
+POPULAR_VIEWS = ["ALL ACTIONS IN THE MATCH"]
+
+REQUIRED_COLUMNS = ['id', 'eventId', 'typeId', 'periodId', 'timeMin', 'timeSec', 'contestantId', 'outcome', 'x', 'y',
+                    'playerName', 'teamName']
+QUALIFIER_COLUMN = re.compile(r"^qualifier/(\d+)/(\w+)$")
+QUALIFIER_FIELDS = ['id', 'qualifierId', 'value']
+
+logger = logging.getLogger("isl.ingest")
+
+_lock = threading.Lock()
+_workers = {}
+
+
+def signature(file_path):
+    stat = os.stat(file_path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def csv_signatures(matches_dir):
+    signatures = {}
+    for file_name in os.listdir(matches_dir):
+        if file_name.endswith(".csv"):
+            try:
+                signatures[file_name[:-len(".csv")]] = signature(os.path.join(matches_dir, file_name))
+            except OSError:
+                continue
+    return signatures
+
+
+def validate(file_path):
+    """Raise ValueError unless the header has the event columns and complete qualifier/N/* triplets."""
+    columns = list(pd.read_csv(file_path, nrows=0).columns)
+    missing = [col for col in REQUIRED_COLUMNS if col not in columns]
+    if missing:
+        raise ValueError(f"missing columns {missing}")
+    fields = {}
+    for col in columns:
+        found = QUALIFIER_COLUMN.match(col)
+        if found:
+            fields.setdefault(int(found.group(1)), set()).add(found.group(2))
+    if not fields:
+        raise ValueError("no qualifier/N/* columns")
+    for n in range(max(fields) + 1):
+        if fields.get(n) != set(QUALIFIER_FIELDS):
+            raise ValueError(f"qualifier/{n}/* has {sorted(fields.get(n, []))}, expected {QUALIFIER_FIELDS}")
+
+
+def ingest(file_path):
+    """Validate, decode and warm everything the app needs for one match file."""
+    validate(file_path)
+    df = match_loader.load_match(file_path)
+    if len(df) == 0:
+        raise ValueError("no events")
+    match_loader.load_event_index(file_path)
+    match_loader.load_territories(file_path)
+    season.warm_partial(file_path)
+    rendered = 0
+    for team, players in match_loader.load_starters(file_path).items():
+        render_cache.render_team_view(file_path, team)
+        for player in players:
+            for view in POPULAR_VIEWS:
+                render_cache.render_view(file_path, team, player, view)
+                rendered += 1
+    return rendered
+
+
+class IngestWorker:
+    def __init__(self, matches_dir=MATCHES_DIR, poll_seconds=POLL_SECONDS, index_path=match_index.INDEX_PATH):
+        self.matches_dir = matches_dir
+        self.index_path = index_path
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        # name -> (mtime_ns, size) of the version that is published, failed, or seen on the last poll.
+        self._published = csv_signatures(matches_dir)
+        self._failed = {}
+        self._seen = {}
+        self.errors = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="isl-ingest", daemon=True)
+
+    def ready(self, name, stat):
+        """Whether this version of the match file has been ingested; the predicate for load_index."""
+        with self._lock:
+            return self._published.get(name) == (stat.st_mtime_ns, stat.st_size)
+
+    def pending(self):
+        """Names of match files that are waiting to be ingested or failed."""
+        current = csv_signatures(self.matches_dir)
+        with self._lock:
+            return sorted(name for name, sig in current.items() if self._published.get(name) != sig)
+
+    def poll(self):
+        """Ingest every file that has stopped changing since the last poll; returns their names."""
+        current = csv_signatures(self.matches_dir)
+        ingested = []
+        for name, sig in sorted(current.items()):
+            with self._lock:
+                if self._published.get(name) == sig or self._failed.get(name) == sig:
+                    continue
+            if self._seen.get(name) != sig:
+                # Still being written, or new since the last poll; look again next time.
+                self._seen[name] = sig
+                continue
+            file_path = os.path.join(self.matches_dir, f"{name}.csv")
+            try:
+                rendered = ingest(file_path)
+                if signature(file_path) != sig:
+                    continue
+            except Exception as error:
+                logger.warning("Skipped %s: %r", name, error)
+                self._failed[name] = sig
+                self.errors[name] = repr(error)
+                continue
+            with self._lock:
+                self._published[name] = sig
+            self.errors.pop(name, None)
+            ingested.append(name)
+            logger.info("Published %s (%d views pre-rendered)", name, rendered)
+        with self._lock:
+            for name in set(self._published) - set(current):
+                del self._published[name]
+        for name in set(self._failed) - set(current):
+            del self._failed[name]
+            self.errors.pop(name, None)
+        if ingested:
+            # Rebuild the listing here rather than in the next visitor's rerun.
+            match_index.invalidate(self.matches_dir)
+            match_index.load_index(self.matches_dir, self.index_path, ready=self.ready)
+        return ingested
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Ingest poll failed")
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+
+def start(matches_dir=MATCHES_DIR, poll_seconds=POLL_SECONDS, index_path=match_index.INDEX_PATH):
+    """The directory's running worker, started on the first call; every session shares it."""
+    key = os.path.abspath(matches_dir)
+    with _lock:
+        worker = _workers.get(key)
+        if worker is None:
+            worker = _workers[key] = IngestWorker(matches_dir, poll_seconds, index_path).start()
+        return worker
@@ -0,0 +1,159 @@
+"""Opt-in timing spans and counters for one rerun of the app.
+
+Turned on with ISL_DEBUG=1 or ?debug=1 in the URL. While it is off, span() hands back one
+shared no-op context manager and count() returns straight away, so the hot path pays one
+thread-local lookup. While it is on, each rerun produces a trace of nested spans,
+counters, the live figure count and the RSS change. The trace is shown in a debug
+expander, logged as one JSON line on the "isl.perf" logger, and added to the cumulative
+metrics written to ISL_METRICS_FILE in Prometheus text format.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+DEBUG = os.environ.get("ISL_DEBUG", "") in ("1", "true", "yes")
+METRICS_FILE = os.environ.get("ISL_METRICS_FILE")
+
+logger = logging.getLogger("isl.perf")
+
+_local = threading.local()
+_noop = nullcontext()
+_totals_lock = threading.Lock()
+_write_lock = threading.Lock()
+_span_totals = {}
+_counter_totals = {}
+_reruns = 0
+
+
+def rss_bytes():
+    """Resident set size from /proc/self/statm; None where that file does not exist."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _live_figures():
+    import pitch_template
+    return pitch_template.live_figures()
+
+
+class Trace:
+    def __init__(self, name):
+        self.root = {'name': name, 'ms': 0.0, 'children': []}
+        self.stack = [self.root]
+        self.counters = {}
+        self.start = time.perf_counter()
+        self.rss_start = rss_bytes()
+
+
+@contextmanager
+def _span(trace, name):
+    node = {'name': name, 'ms': 0.0, 'children': []}
+    trace.stack[-1]['children'].append(node)
+    trace.stack.append(node)
+    start = time.perf_counter()
+    try:
+        yield node
+    finally:
+        node['ms'] = round((time.perf_counter() - start) * 1000, 3)
+        trace.stack.pop()
+
+
+def span(name):
+    """Time the enclosed block as a child of the current span; a no-op when tracing is off."""
+    trace = getattr(_local, 'trace', None)
+    if trace is None:
+        return _noop
+    return _span(trace, name)
+
+
+def count(name, n=1):
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.counters[name] = trace.counters.get(name, 0) + n
+
+
+def begin_rerun(enabled=None, name="rerun"):
+    """Start tracing this thread's rerun if enabled (default: ISL_DEBUG)."""
+    _local.trace = Trace(name) if (DEBUG if enabled is None else enabled) else None
+    return _local.trace is not None
+
+
+def end_rerun():
+    """Finish the rerun's trace and publish it; returns the trace as a dict, or None when off."""
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    if trace is None:
+        return None
+    trace.root['ms'] = round((time.perf_counter() - trace.start) * 1000, 3)
+    rss = rss_bytes()
+    result = {
+        'spans': trace.root,
+        'counters': trace.counters,
+        'live_figures': _live_figures(),
+        'rss_bytes': rss,
+        'rss_delta_bytes': None if rss is None or trace.rss_start is None else rss - trace.rss_start,
+    }
+    logger.info(json.dumps(result, separators=(',', ':')))
+    _add_totals(result)
+    if METRICS_FILE:
+        write_metrics(METRICS_FILE, result)
+    return result
+
+
+def flatten(node, prefix=""):
+    """(path, ms) for every span in the tree, e.g. ("rerun/render_view/encode", 812.4)."""
+    path = f"{prefix}/{node['name']}" if prefix else node['name']
+    yield path, node['ms']
+    for child in node['children']:
+        yield from flatten(child, path)
+
+
+def _add_totals(result):
+    global _reruns
+    with _totals_lock:
+        _reruns += 1
+        for path, ms in flatten(result['spans']):
+            seconds, calls = _span_totals.get(path, (0.0, 0))
+            _span_totals[path] = (seconds + ms / 1000, calls + 1)
+        for name, n in result['counters'].items():
+            _counter_totals[name] = _counter_totals.get(name, 0) + n
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def metrics_text(result=None):
+    """Cumulative totals in Prometheus text exposition format."""
+    with _totals_lock:
+        lines = [
+            "# TYPE isl_reruns_total counter",
+            f"isl_reruns_total {_reruns}",
+            "# TYPE isl_span_seconds_total counter",
+        ]
+        lines += [f'isl_span_seconds_total{{span="{_label(path)}"}} {seconds:.6f}' for path, (seconds, _) in sorted(_span_totals.items())]
+        lines.append("# TYPE isl_span_calls_total counter")
+        lines += [f'isl_span_calls_total{{span="{_label(path)}"}} {calls}' for path, (_, calls) in sorted(_span_totals.items())]
+        lines.append("# TYPE isl_events_total counter")
+        lines += [f'isl_events_total{{name="{_label(name)}"}} {n}' for name, n in sorted(_counter_totals.items())]
+    if result is not None:
+        lines += ["# TYPE isl_live_figures gauge", f"isl_live_figures {result['live_figures']}"]
+        if result['rss_bytes'] is not None:
+            lines += ["# TYPE isl_rss_bytes gauge", f"isl_rss_bytes {result['rss_bytes']}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path, result=None):
+    # Written whole and renamed, for node_exporter's textfile collector. Sessions are threads
+    # sharing the pid in the temp name, so writes take turns; the last one has the newest totals.
+    with _write_lock:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(metrics_text(result))
+        os.replace(tmp_path, path)
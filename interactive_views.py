@@ -0,0 +1,226 @@
+"""Browser-side versions of the pitch views, drawn with Vega-Lite instead of matplotlib.
+
+The server only slices the player's events into a compact frame (x, y, end_x, end_y and the
+layer each row belongs to), which Streamlit ships to the browser as Arrow, plus a spec
+built from the same style table as the static views. Clicking a legend entry toggles that
+layer and dragging or scrolling pans and zooms, all without a rerun.
+"""
+from matplotlib.colors import to_hex
+import numpy as np
+import pandas as pd
+import heatmap
+import layers
+from match_loader import load_event_index, load_territories
+from territory import Territory
+
+WIDTH = 440
+HEIGHT = round(WIDTH * 105 / 68)
+
+
+def _polygon(points):
+    return "M" + "L".join(f"{x:.3f},{y:.3f}" for x, y in points) + "Z"
+
+
+def _star(n, inner):
+    angles = np.pi / 2 + np.arange(2 * n) * np.pi / n
+    radii = np.where(np.arange(2 * n) % 2 == 0, 1.0, inner)
+    return _polygon(zip(radii * np.cos(angles), -radii * np.sin(angles)))
+
+
+def _regular(n, rotation=0.0):
+    angles = rotation + np.arange(n) * 2 * np.pi / n
+    return _polygon(zip(np.cos(angles), -np.sin(angles)))
+
+
+def _cross(width, rotation):
+    arm = [(-width, -1), (width, -1), (width, -width), (1, -width), (1, width), (width, width),
+           (width, 1), (-width, 1), (-width, width), (-1, width), (-1, -width), (-width, -width)]
+    c, s = np.cos(rotation), np.sin(rotation)
+    return _polygon((x * c - y * s, x * s + y * c) for x, y in arm)
+
+
+# matplotlib marker -> Vega-Lite shape (a named shape or an SVG path in a -1..1 box).
+SHAPES = {
+    'o': 'circle',
+    'football': 'circle',
+    '^': 'triangle-up',
+    'D': 'diamond',
+    '+': _cross(0.15, 0),
+    'P': _cross(0.3, 0),
+    'x': _cross(0.15, np.pi / 4),
+    'X': _cross(0.3, np.pi / 4),
+    '*': _star(5, 0.45),
+    'H': _regular(6),
+    'p': _regular(5, np.pi / 2),
+}
+
+
+def _ellipse(cx, cy, rx, ry, start=0.0, stop=2 * np.pi, n=48):
+    angles = np.linspace(start, stop, n)
+    xs, ys = cx + rx * np.cos(angles), cy + ry * np.sin(angles)
+    return [(xs[i], ys[i], xs[i + 1], ys[i + 1]) for i in range(n - 1)]
+
+
+def pitch_lines():
+    """Opta pitch markings as (x, y, end_x, end_y) segments."""
+    # A 9.15 m radius is 8.71 units along the 105 m length and 13.46 across the 68 m width.
+    rx, ry = 9.15 / 105 * 100, 9.15 / 68 * 100
+    segments = [(0, 0, 100, 0), (100, 0, 100, 100), (100, 100, 0, 100), (0, 100, 0, 0), (50, 0, 50, 100)]
+    for goal_line, sign in [(0, 1), (100, -1)]:
+        box, six, spot = goal_line + sign * 17, goal_line + sign * 5.8, goal_line + sign * 11.5
+        segments += [(goal_line, 21.1, box, 21.1), (box, 21.1, box, 78.9), (box, 78.9, goal_line, 78.9),
+                     (goal_line, 36.8, six, 36.8), (six, 36.8, six, 63.2), (six, 63.2, goal_line, 63.2)]
+        # The part of the penalty arc outside the box.
+        reach = np.arccos(min(1.0, abs(box - spot) / rx))
+        middle = 0.0 if sign == 1 else np.pi
+        segments += _ellipse(spot, 50, rx, ry, middle - reach, middle + reach, n=16)
+    segments += _ellipse(50, 50, rx, ry)
+    return [{'x': x, 'y': y, 'end_x': ex, 'end_y': ey} for x, y, ex, ey in segments]
+
+
+def _rows(rows, label, kind, size):
+    return pd.DataFrame({
+        'x': rows['x'].to_numpy(dtype='float32'),
+        'y': rows['y'].to_numpy(dtype='float32'),
+        'end_x': rows['end_x'].to_numpy(dtype='float32'),
+        'end_y': rows['end_y'].to_numpy(dtype='float32'),
+        'layer': label,
+        'kind': kind,
+        # Marker area for points, line width for segments.
+        'size': np.float32(size),
+    })
+
+
+def _points(starts, ends, label, kind, size):
+    """Like _rows, from (n, 2) arrays of start and end points, e.g. a hull's edges."""
+    return pd.DataFrame({
+        'x': starts[:, 0].astype('float32'), 'y': starts[:, 1].astype('float32'),
+        'end_x': ends[:, 0].astype('float32'), 'end_y': ends[:, 1].astype('float32'),
+        'layer': label, 'kind': kind, 'size': np.float32(size),
+    })
+
+
+def layer_frame(events, action_filter, player_position, territory=None):
+    """The rows of every layer of the view, with the styles of the layers that appear in it."""
+    frames, styles = [], []
+    if action_filter in layers.VIEWS:
+        for layer in layers.VIEWS[action_filter][layers.role(player_position)][0]:
+            spec = layers.LAYERS[layer]
+            if 'label' not in spec:
+                continue
+            if spec['kind'] in ('arrows', 'lines'):
+                kind, size = 'segment', 2.5 if spec['kind'] == 'lines' else 1
+            else:
+                kind, size = 'point', spec['s']
+            frames.append(_rows(layers.select(events, layer), spec['label'], kind, size))
+            # Browsers do not know matplotlib's one-letter colours ('w', 'r').
+            styles.append((spec['label'], to_hex(spec['c']), SHAPES.get(spec.get('marker', 'o'), 'circle')))
+    else:
+        if territory is None:
+            territory = Territory.from_events(events.all())
+        points = territory.points
+        frames.append(_points(points, points, 'Action', 'point', 80))
+        styles.append(('Action', '#00FF00', 'circle'))
+        if territory.hull is not None:
+            frames.append(_points(territory.hull, np.roll(territory.hull, -1, axis=0), 'Convex Hull', 'segment', 3))
+            styles.append(('Convex Hull', '#00FFFF', 'circle'))
+    frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=['x', 'y', 'end_x', 'end_y', 'layer', 'kind', 'size'])
+    frame['layer'] = pd.Categorical(frame['layer'], categories=[s[0] for s in styles])
+    frame['kind'] = pd.Categorical(frame['kind'])
+    return frame, styles
+
+
+def _heat_cells(events, step=3):
+    """The cached pass density, averaged into step x step cells and without the faint tenth."""
+    passes = events.type(1)[['x', 'y']].dropna()
+    grid = heatmap.cached_density((events.key, 'passes'), passes.x, passes.y)
+    if not grid.any():
+        return []
+    rows, cols = grid.shape[0] // step * step, grid.shape[1] // step * step
+    cells = grid[:rows, :cols].reshape(rows // step, step, cols // step, step).mean(axis=(1, 3))
+    dx, dy = 100 / grid.shape[0] * step, 100 / grid.shape[1] * step
+    return [
+        {'x': i * dx, 'end_x': (i + 1) * dx, 'y': j * dy, 'end_y': (j + 1) * dy, 'density': round(float(value), 3)}
+        for (i, j), value in np.ndenumerate(cells) if value >= 1 / heatmap.N_LEVELS
+    ]
+
+
+def spec(styles, heat_cells, title=None):
+    labels = [s[0] for s in styles]
+    # Vertical pitch, as in the static views: length (x) up the chart, width (y) across it, mirrored.
+    across = {'field': 'y', 'type': 'quantitative', 'scale': {'domain': [102, -2]}, 'axis': None}
+    up = {'field': 'x', 'type': 'quantitative', 'scale': {'domain': [-2, 102]}, 'axis': None}
+    layer_color = {'field': 'layer', 'type': 'nominal', 'title': None,
+                   'scale': {'domain': labels, 'range': [s[1] for s in styles]}}
+    selected = {'param': 'layers'}
+    opacity = {'condition': {**selected, 'value': 1}, 'value': 0.08}
+    chart_layers = [
+        {
+            'data': {'values': pitch_lines()},
+            'mark': {'type': 'rule', 'color': 'white', 'strokeWidth': 2},
+            'encoding': {'x': across, 'y': up, 'x2': {'field': 'end_y'}, 'y2': {'field': 'end_x'}},
+        },
+    ]
+    if heat_cells:
+        chart_layers.append({
+            'data': {'values': heat_cells},
+            'mark': {'type': 'rect', 'opacity': 0.4},
+            'encoding': {'x': across, 'y': up, 'x2': {'field': 'end_y'}, 'y2': {'field': 'end_x'},
+                         'fill': {'field': 'density', 'type': 'quantitative', 'scale': {'scheme': 'magma'}, 'legend': None}},
+        })
+    chart_layers += [
+        {
+            'transform': [{'filter': "datum.kind == 'segment'"}],
+            'mark': {'type': 'rule'},
+            'encoding': {'x': across, 'y': up, 'x2': {'field': 'end_y'}, 'y2': {'field': 'end_x'},
+                         'color': layer_color, 'opacity': opacity,
+                         'strokeWidth': {'field': 'size', 'type': 'quantitative', 'scale': None}},
+        },
+        {
+            'params': [
+                {'name': 'layers', 'select': {'type': 'point', 'fields': ['layer']}, 'bind': 'legend'},
+                {'name': 'zoom', 'select': 'interval', 'bind': 'scales'},
+            ],
+            'transform': [{'filter': "datum.kind == 'point'"}],
+            'mark': {'type': 'point', 'filled': True, 'stroke': 'black', 'strokeWidth': 1},
+            'encoding': {
+                'x': across, 'y': up, 'color': layer_color, 'opacity': opacity,
+                'shape': {'field': 'layer', 'type': 'nominal', 'title': None,
+                          'scale': {'domain': labels, 'range': [s[2] for s in styles]}},
+                'size': {'field': 'size', 'type': 'quantitative', 'scale': None},
+                'tooltip': [{'field': 'layer', 'title': 'Action'}],
+            },
+        },
+    ]
+    chart_spec = {
+        'width': WIDTH,
+        'height': HEIGHT,
+        'background': 'black',
+        'config': {'view': {'stroke': None},
+                   'legend': {'labelColor': 'white', 'orient': 'top', 'columns': 4, 'symbolStrokeColor': 'black'},
+                   'title': {'color': 'white'}},
+        'layer': chart_layers,
+    }
+    if title:
+        chart_spec['title'] = title
+    return chart_spec
+
+
+def chart(events, action_filter, player_position, title=None, territory=None):
+    """(frame, Vega-Lite spec) for one view; pass both to st.vega_lite_chart."""
+    frame, styles = layer_frame(events, action_filter, player_position, territory)
+    cells = _heat_cells(events) if action_filter in layers.VIEWS else []
+    return frame, spec(styles, cells, title)
+
+
+def match_chart(file_path, player, action_filter, window=None):
+    index = load_event_index(file_path)
+    player_rows = index.player(player).all()
+    player_position = player_rows['Position'].iloc[0] if len(player_rows) else None
+    territory = load_territories(file_path).get(player) if window is None else None
+    return chart(index.player(player, window), action_filter, player_position, territory=territory)
+
+
+def season_chart(season, team, player, view):
+    events = season.player(team, player)
+    return chart(events, view, events.position())
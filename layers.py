@@ -0,0 +1,191 @@
+"""Event layers of the match views, described by a style table instead of one scatter call each.
+
+LAYERS says how to select a layer's events and how to draw them; VIEWS lists the layers of
+each view for outfield players and goalkeepers, with where their legend goes. Plain
+marker layers are batched into one collection per marker shape, and the legend is built
+from the table, so empty layers cost nothing but still get their legend entry.
+"""
+from matplotlib.collections import PathCollection
+from matplotlib.colors import to_rgba_array
+from matplotlib.lines import Line2D
+from matplotlib.markers import MarkerStyle
+from matplotlib.transforms import IdentityTransform
+from mplsoccer.soccer.markers import HandlerFootball, football_hexagon_marker
+import numpy as np
+
+import heatmap
+
+# select: (typeId, outcome or None) or the name of a flag column.
+# kind: 'scatter' (batched), 'football', 'arrows' or 'lines' (comet lines, e.g. assists).
+LAYERS = {
+    'goal': dict(select=(16, None), kind='football', s=120, c='#06402b', edgecolor='#00ff00', label='Goal'),
+    'shot_saved': dict(select=(15, None), kind='football', s=120, c='#ff7c60', edgecolor='#000000', label='Saved/Blocked Shot'),
+    'shot_post': dict(select=(14, None), kind='football', s=120, c='w', edgecolor='#000000', label='Shot Off Woodwork'),
+    'shot_miss': dict(select=(13, None), kind='football', s=120, c='r', edgecolor='#000000', label='Shot Off Target'),
+
+    'completed_pass': dict(select=(1, 1), kind='arrows', c='#00ff00', label='Completed Pass'),
+    # In the all-actions view key passes have their own layer, so they are not drawn twice.
+    'completed_pass_no_key': dict(select=(1, 1), exclude='keyPass', kind='arrows', c='#00ff00', label='Completed Pass'),
+    'incomplete_pass': dict(select=(1, 0), kind='arrows', c='red', label='Incomplete Pass'),
+    'assist': dict(select='assist', kind='lines', c='#00ff00', label='Assist'),
+    'assist_end': dict(select='assist', at=('end_x', 'end_y'), kind='scatter', marker='o', s=50, c='black', edgecolor='#00ff00'),
+    'key_pass': dict(select='keyPass', kind='lines', c='#ffea00', label='Key Pass'),
+    'key_pass_end': dict(select='keyPass', at=('end_x', 'end_y'), kind='scatter', marker='o', s=50, c='black', edgecolor='#ffea00'),
+
+    'dribble': dict(select=(3, 1), kind='scatter', marker='*', s=200, c='#009afd', label='Dribble'),
+    'tackle': dict(select=(7, None), kind='scatter', marker='H', s=130, c='#bebebe', label='Tackle'),
+    'recovery': dict(select=(49, None), kind='scatter', marker='H', s=130, c='#fcd200', label='Ball Recovery'),
+    'block': dict(select=(10, None), kind='scatter', marker='H', s=130, c='cyan', label='Block'),
+    # Goalkeepers' blocks (typeId 10) are saves.
+    'save': dict(select=(10, None), kind='scatter', marker='*', s=200, c='#00ff00', label='Save'),
+    'interception': dict(select=(8, None), kind='scatter', marker='H', s=130, c='#ff007f', label='Interception'),
+    'clearance': dict(select=(12, None), kind='scatter', marker='x', s=100, c='#9999ff', label='Clearance'),
+    'offside': dict(select=(55, None), kind='scatter', marker='P', s=120, c='#fcd200', label='Offside Provoked'),
+    'shield': dict(select=(56, None), kind='scatter', marker='D', s=50, c='#dd571c', label='Shielding Ball Out'),
+    'punch': dict(select=(41, None), kind='scatter', marker='o', s=100, c='#ffec00', label='Punch'),
+    'pickup': dict(select=(52, None), kind='scatter', marker='+', s=120, c='#dd571c', label='Pick-Up'),
+    'foul_won': dict(select=(4, 1), kind='scatter', marker='X', s=120, c='#008000', label='Foul Won'),
+    'foul_committed': dict(select=(4, 0), kind='scatter', marker='X', s=120, c='#c21919', label='Foul Committed'),
+    'aerial_won': dict(select=(44, 1), kind='scatter', marker='^', s=100, c='#008000', label='Aerial Won'),
+    'aerial_lost': dict(select=(44, 0), kind='scatter', marker='^', s=100, c='#c21919', label='Aerial Lost'),
+    'dispossessed': dict(select=(50, None), kind='scatter', marker='p', s=100, c='#cb0000', label='Dispossessed'),
+    'dribbled_past': dict(select=(45, None), kind='scatter', marker='x', s=50, c='#cb0000', label='Dribbled Past'),
+    'own_goal': dict(select='own_goal', kind='scatter', marker='o', s=120, c='red', edgecolor='orange', label='Own Goal'),
+}
+
+ARROW_STYLE = {
+    'outfield': dict(width=0.6, headwidth=5, headlength=5),
+    'goalkeeper': dict(width=0.75),
+}
+
+SHOTS = ['goal', 'shot_saved', 'shot_post', 'shot_miss']
+CREATED = ['assist', 'assist_end', 'key_pass', 'key_pass_end']
+PASSES = ['completed_pass', 'incomplete_pass']
+
+# view -> role -> (layers in drawing and legend order, legend bbox_to_anchor, legend columns)
+VIEWS = {
+    "ALL ACTIONS IN THE MATCH": {
+        'outfield': (
+            SHOTS + CREATED + ['completed_pass_no_key', 'incomplete_pass', 'dribble', 'tackle', 'recovery', 'block',
+                               'interception', 'clearance', 'offside', 'shield', 'foul_won', 'foul_committed',
+                               'aerial_won', 'aerial_lost', 'dispossessed', 'dribbled_past', 'own_goal'],
+            (-0.23, 1.17), 4),
+        'goalkeeper': (
+            ['completed_pass_no_key', 'incomplete_pass', 'save', 'punch', 'pickup', 'tackle', 'recovery', 'interception',
+             'clearance', 'shield', 'dribble', 'foul_won', 'foul_committed', 'dispossessed', 'dribbled_past', 'own_goal'],
+            (-0.19, 1.12), 4),
+    },
+    "PASSES & HEATMAP": dict.fromkeys(['outfield', 'goalkeeper'], (PASSES + CREATED, (0.205, 1.06), 2)),
+    "OFFENSIVE ACTIONS": dict.fromkeys(['outfield', 'goalkeeper'], (
+        SHOTS + CREATED + ['dribble', 'foul_won', 'foul_committed', 'aerial_won', 'aerial_lost', 'dispossessed'],
+        (-0.2, 1.09), 4)),
+    "DEFENSIVE ACTIONS": {
+        'outfield': (
+            ['tackle', 'recovery', 'block', 'interception', 'clearance', 'offside', 'shield', 'foul_won',
+             'foul_committed', 'aerial_won', 'aerial_lost', 'dispossessed', 'dribbled_past', 'own_goal'],
+            (-0.17, 1.12), 4),
+        'goalkeeper': (
+            ['save', 'punch', 'pickup', 'tackle', 'recovery', 'interception', 'shield', 'foul_won', 'foul_committed',
+             'dispossessed', 'dribbled_past', 'own_goal'],
+            (-0.13, 1.09), 4),
+    },
+}
+
+
+def role(player_position):
+    return 'goalkeeper' if player_position == 'Goalkeeper' else 'outfield'
+
+
+def select(events, layer):
+    spec = LAYERS[layer]
+    if isinstance(spec['select'], str):
+        rows = events.flag(spec['select'])
+    else:
+        type_id, outcome = spec['select']
+        rows = events.type(type_id, outcome=outcome)
+    if 'exclude' in spec:
+        rows = rows[rows[spec['exclude']] != 1]
+    return rows
+
+
+def _is_filled(marker):
+    return MarkerStyle(marker).is_filled()
+
+
+def legend_handle(layer):
+    """A stand-in artist that looks like one point of a batched scatter layer."""
+    spec = LAYERS[layer]
+    color = spec['c']
+    edge = spec.get('edgecolor', '#000000') if _is_filled(spec['marker']) else color
+    return Line2D([], [], linestyle='none', marker=spec['marker'], markersize=np.sqrt(spec['s']),
+                  markerfacecolor=color, markeredgecolor=edge, label=spec['label'])
+
+
+def football_handle(layer):
+    """A stand-in football for the legend, drawn by HandlerFootball like a labelled football scatter.
+
+    Passing label= to pitch.scatter(marker='football') instead registers the drawn collection
+    in matplotlib's process-wide legend handler map, which then keeps every figure alive.
+    """
+    spec = LAYERS[layer]
+    # Marker paths are in points, as for a scatter; the legend would otherwise scale them to the figure.
+    return PathCollection([football_hexagon_marker], sizes=[spec['s']], facecolors=[spec['c']],
+                          edgecolors=[spec['edgecolor']], linewidths=0.5, label=spec['label'],
+                          transform=IdentityTransform())
+
+
+def draw_scatter(ax, batches):
+    """One collection per marker shape; batches maps marker -> list of (rows, spec)."""
+    for marker, parts in batches.items():
+        x, y, sizes, faces, edges = [], [], [], [], []
+        for rows, spec in parts:
+            at_x, at_y = spec.get('at', ('x', 'y'))
+            n = len(rows)
+            # Vertical pitch: the pitch's length (x) runs up the axes.
+            x.append(rows[at_y].to_numpy(dtype=float))
+            y.append(rows[at_x].to_numpy(dtype=float))
+            sizes.append(np.full(n, spec['s'], dtype=float))
+            faces += [spec['c']] * n
+            # Unfilled markers (x, +) are drawn in their face colour, as scatter itself does.
+            edges += [spec.get('edgecolor', '#000000') if _is_filled(marker) else spec['c']] * n
+        if not faces:
+            continue
+        ax.scatter(np.concatenate(x), np.concatenate(y), s=np.concatenate(sizes), marker=marker,
+                   facecolors=to_rgba_array(faces), edgecolors=to_rgba_array(edges))
+
+
+def draw_layers(pitch, ax, events, layers, player_position):
+    """Draw the layers in order; returns their legend handles, in the same order, and the
+    handler_map the legend needs for the football ones."""
+    style = ARROW_STYLE[role(player_position)]
+    handles = {}
+    handler_map = {}
+    batches = {}
+    for layer in layers:
+        spec = LAYERS[layer]
+        rows = select(events, layer)
+        kind = spec['kind']
+        if kind == 'scatter':
+            batches.setdefault(spec['marker'], []).append((rows, spec))
+            if 'label' in spec:
+                handles[layer] = legend_handle(layer)
+        elif kind == 'football':
+            pitch.scatter(rows.x, rows.y, s=spec['s'], c=spec['c'], edgecolors=spec['edgecolor'], marker='football', ax=ax)
+            handles[layer] = football_handle(layer)
+            handler_map[handles[layer]] = HandlerFootball()
+        elif kind == 'arrows':
+            handles[layer] = pitch.arrows(rows.x, rows.y, rows.end_x, rows.end_y, color=spec['c'], ax=ax,
+                                          label=spec['label'], **style)
+        elif kind == 'lines':
+            handles[layer] = pitch.lines(rows.x, rows.y, rows.end_x, rows.end_y, color=spec['c'], comet=True,
+                                         lw=2.5, ax=ax, label=spec['label'])
+    draw_scatter(ax, batches)
+    return [handles[layer] for layer in layers if layer in handles], handler_map
+
+
+def draw_view(pitch, ax, events, action_filter, player_position):
+    layers, anchor, ncol = VIEWS[action_filter][role(player_position)]
+    heatmap.draw(pitch, ax, events.type(1), key=(events.key, 'passes'))
+    handles, handler_map = draw_layers(pitch, ax, events, layers, player_position)
+    ax.legend(handles=handles, handler_map=handler_map, loc='upper left', bbox_to_anchor=anchor, facecolor='black',
+              labelcolor='white', prop={'size': 10}, framealpha=0.5, ncol=ncol, edgecolor='#ffffff')
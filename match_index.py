@@ -0,0 +1,120 @@
+"""Metadata for every match file, so the app can list matches, teams and players without
+opening an event file.
+
+Match number, stage, teams and score come from the file name; row count, hash and the
+players of each team are read once per file version. The index is kept in
+store/match_index.json and only re-checked when the Matches/ directory changes.
+"""
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+from natsort import natsorted
+
+from match_loader import file_hash
+from season_store import STORE_DIR
+
+MATCHES_DIR = "Matches"
+INDEX_PATH = os.path.join(STORE_DIR, "match_index.json")
+INDEX_VERSION = 1
+
+# "Match 159 - SF 1 (First Leg) - Bengaluru FC 2-0 FC Goa"; the stage part is optional.
+NAME_PATTERN = re.compile(r"^Match (\d+) - (?:(.+?) - )?(.+) (\d+)-(\d+) (.+)$")
+
+_lock = threading.Lock()
+_indexes = {}
+
+
+def parse_name(name):
+    """Fields encoded in a match file name; teams and score are None if it does not parse."""
+    found = NAME_PATTERN.match(name)
+    if found is None:
+        return {'number': None, 'stage': None, 'home': None, 'away': None, 'score': None}
+    number, stage, home, home_goals, away_goals, away = found.groups()
+    return {
+        'number': int(number),
+        'stage': stage or "League",
+        'home': home,
+        'away': away,
+        'score': [int(home_goals), int(away_goals)],
+    }
+
+
+def build_entry(file_path):
+    stat = os.stat(file_path)
+    name = os.path.basename(file_path)[:-len(".csv")]
+    df = pd.read_csv(file_path, usecols=['teamName', 'playerName'])
+    teams = list(df['teamName'].dropna().unique())
+    entry = parse_name(name)
+    entry.update({
+        'rows': len(df),
+        'hash': file_hash(file_path),
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        # Same order the app used when it read the teams from the events.
+        'teams': teams,
+        'players': {team: sorted(df.loc[df['teamName'] == team, 'playerName'].dropna().unique()) for team in teams},
+    })
+    return entry
+
+
+def _read(path):
+    try:
+        with open(path, encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index['matches'] if index.get('version') == INDEX_VERSION else {}
+
+
+def _write(matches, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': INDEX_VERSION, 'matches': matches}, f, indent=1, ensure_ascii=False, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def load_index(matches_dir=MATCHES_DIR, index_path=INDEX_PATH, ready=None):
+    """{match name: metadata}; costs one stat per call while the directory is unchanged.
+
+    ready(name, stat), when given, leaves out files it returns False for, e.g. matches the
+    ingest worker has not finished with; call invalidate() when its answer changes.
+    """
+    dir_mtime = os.stat(matches_dir).st_mtime_ns
+    with _lock:
+        cached = _indexes.get(matches_dir)
+        if cached is not None and cached[0] == dir_mtime:
+            return cached[1]
+
+        previous = _read(index_path)
+        matches = {}
+        for file_name in os.listdir(matches_dir):
+            if not file_name.endswith(".csv"):
+                continue
+            name = file_name[:-len(".csv")]
+            file_path = os.path.join(matches_dir, file_name)
+            stat = os.stat(file_path)
+            if ready is not None and not ready(name, stat):
+                continue
+            entry = previous.get(name)
+            if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                entry = build_entry(file_path)
+            matches[name] = entry
+        if matches != previous:
+            _write(matches, index_path)
+        _indexes[matches_dir] = (dir_mtime, matches)
+        return matches
+
+
+def invalidate(matches_dir=MATCHES_DIR):
+    """Forget the cached listing, so the next load_index re-checks every file."""
+    with _lock:
+        _indexes.pop(matches_dir, None)
+
+
+def match_names(index):
+    """Newest match first, comparing match numbers as numbers."""
+    return natsorted(index, reverse=True)
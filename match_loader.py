@@ -0,0 +1,139 @@
+import hashlib
+import os
+
+import pandas as pd
+
+import instrumentation
+import qualifiers
+import season_store
+from cache import BoundedCache
+from event_index import EventIndex
+from qualifiers import QualifierTable
+from territory import match_starters, match_territories
+
+MATCH_CACHE_MB = int(os.environ.get("ISL_MATCH_CACHE_MB", "256"))
+
+COORDINATE_COLUMNS = ['x', 'y', 'end_x', 'end_y']
+CATEGORY_COLUMNS = ['contestantId', 'playerId', 'playerName', 'teamName', 'Position']
+EVENT_DTYPES = {
+    'id': 'int64',
+    'eventId': 'int16',
+    'typeId': 'int8',
+    'periodId': 'int8',
+    'timeMin': 'int16',
+    'timeSec': 'int8',
+    'outcome': 'int8',
+    'keyPass': 'int8',
+    'assist': 'int8',
+}
+_match_cache = BoundedCache(MATCH_CACHE_MB * 1024 * 1024)
+_file_hashes = {}
+
+
+def file_key(file_path):
+    stat = os.stat(file_path)
+    return (os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+def file_hash(file_path):
+    """SHA-256 of the file contents, computed once per file version."""
+    key = file_key(file_path)
+    digest = _file_hashes.get(key)
+    if digest is None:
+        with open(file_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        _file_hashes[key] = digest
+    return digest
+
+
+def decode(raw):
+    """Split a raw match frame into the compact event frame and its qualifier table.
+
+    The event frame keeps only the decoded columns, with small numeric types, float32
+    coordinates (end_x/end_y taken from qualifiers 140/141) and categorical names.
+    """
+    table = QualifierTable.from_frame(raw)
+    df = pd.DataFrame(index=pd.RangeIndex(len(raw)))
+    for col, dtype in EVENT_DTYPES.items():
+        values = raw[col] if col in raw.columns else 0
+        df[col] = pd.Series(values, index=df.index).fillna(0).astype(dtype)
+
+    df['x'] = pd.to_numeric(raw['x'], errors='coerce').to_numpy(dtype='float32')
+    df['y'] = pd.to_numeric(raw['y'], errors='coerce').to_numpy(dtype='float32')
+    df['end_x'] = table.values(qualifiers.END_X)
+    df['end_y'] = table.values(qualifiers.END_Y)
+
+    own_goal = table.values(qualifiers.GOAL_TYPE, numeric=False) == 'OWN_GOAL'
+    df['own_goal'] = own_goal & (df['typeId'] == 16).to_numpy()
+    for col, qualifier_id in qualifiers.PASS_FLAGS.items():
+        df[col] = table.has(qualifier_id)
+
+    for col in CATEGORY_COLUMNS:
+        values = raw[col].astype(object).where(raw[col].notna(), None) if col in raw.columns else None
+        df[col] = pd.Categorical(pd.Series(values, index=df.index, dtype=object))
+    return df, table
+
+
+def read_csv(file_path):
+    with instrumentation.span('csv_parse'):
+        raw = pd.read_csv(file_path, low_memory=False)
+    with instrumentation.span('decode'):
+        return decode(raw)
+
+
+def _load(file_path):
+    key = file_key(file_path)
+    entry = _match_cache.get(key)
+    instrumentation.count('match_cache_miss' if entry is None else 'match_cache_hit')
+    if entry is None:
+        # A newer version of the file replaces whatever was cached for the old one.
+        _match_cache.discard(lambda k: k[0] == key[0] and k[1:3] != key[1:3])
+        with instrumentation.span('store_read'):
+            entry = season_store.read_match(file_path)
+        if entry is None:
+            entry = read_csv(file_path)
+        entry = _match_cache.put(key, entry)
+    return entry
+
+
+def load_match(file_path):
+    """Return the decoded event frame for a match CSV, parsing it at most once per file version.
+
+    The frame is shared by every session, so callers must treat it as read-only.
+    """
+    return _load(file_path)[0]
+
+
+def load_event_index(file_path):
+    key = file_key(file_path) + ('index',)
+    index = _match_cache.get(key)
+    if index is None:
+        df = load_match(file_path)
+        with instrumentation.span('event_index'):
+            index = _match_cache.put(key, EventIndex(df, file_hash(file_path)))
+    return index
+
+
+def load_timeline(file_path):
+    """The match's Timeline, built together with (and shared by) its event index."""
+    return load_event_index(file_path).timeline
+
+
+def load_territories(file_path):
+    """{player: Territory} for every player of the match, built in one pass and cached like the index."""
+    key = file_key(file_path) + ('territory',)
+    territories = _match_cache.get(key)
+    if territories is None:
+        df = load_match(file_path)
+        with instrumentation.span('territories'):
+            territories = _match_cache.put(key, match_territories(df))
+    return territories
+
+
+def load_starters(file_path):
+    """{team: starters} of the match, found once per file version like the territories."""
+    key = file_key(file_path) + ('starters',)
+    starters = _match_cache.get(key)
+    if starters is None:
+        starters = _match_cache.put(key, match_starters(load_match(file_path)))
+    return starters
@@ -0,0 +1,90 @@
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from mplsoccer import VerticalPitch
+
+import instrumentation
+
+PITCH_KWARGS = dict(pitch_type='opta', pitch_color='black', line_color='white', linewidth=3, corner_arcs=True)
+FIGSIZE = (10, 10)
+# Pixels per inch of the cached background; matches the 200 dpi the views are saved at.
+BACKGROUND_DPI = 200
+
+_lock = threading.Lock()
+_background = None
+_live_figures = 0
+
+
+def new_pitch():
+    return VerticalPitch(**PITCH_KWARGS)
+
+
+def _draw_background():
+    """Rasterize the pitch markings once, exactly as pitch.draw() lays them out."""
+    pitch = new_pitch()
+    fig = Figure(figsize=FIGSIZE, dpi=BACKGROUND_DPI)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    pitch.draw(ax=ax)
+    canvas.draw()
+
+    # Keep only the axes area, so the image can be placed back at the axes' data limits.
+    rgba = np.asarray(canvas.buffer_rgba())
+    box = ax.get_window_extent()
+    height = rgba.shape[0]
+    top, bottom = int(round(height - box.y1)), int(round(height - box.y0))
+    left, right = int(round(box.x0)), int(round(box.x1))
+    image = rgba[top:bottom, left:right].copy()
+    image.setflags(write=False)
+    return {
+        'image': image,
+        'xlim': ax.get_xlim(),
+        'ylim': ax.get_ylim(),
+        'aspect': ax.get_aspect(),
+    }
+
+
+def background():
+    global _background
+    with _lock:
+        if _background is None:
+            _background = _draw_background()
+        return _background
+
+
+def live_figures():
+    return _live_figures
+
+
+@contextmanager
+def pitch_figure():
+    """Yield (pitch, fig, ax) with the cached pitch already in place.
+
+    The figure is not registered with pyplot, so nothing keeps it alive after the block;
+    it is cleared on exit to drop its artists straight away.
+    """
+    global _live_figures
+    instrumentation.count('figures_drawn')
+    template = background()
+    pitch = new_pitch()
+    # pitch.draw() switches the layout engine off after creating its figure, so do the same.
+    fig = Figure(figsize=FIGSIZE, facecolor='black')
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    xlim, ylim = template['xlim'], template['ylim']
+    ax.imshow(template['image'], extent=(xlim[0], xlim[1], ylim[0], ylim[1]), origin='upper', zorder=0)
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    ax.set_aspect(template['aspect'])
+    ax.axis('off')
+    with _lock:
+        _live_figures += 1
+    try:
+        yield pitch, fig, ax
+    finally:
+        fig.clear()
+        with _lock:
+            _live_figures -= 1
@@ -0,0 +1,77 @@
+import io
+
+from matplotlib import colormaps
+import numpy as np
+
+import instrumentation
+import layers
+from pitch_template import pitch_figure
+from territory import Territory
+
+
+def encode(fig):
+    # Same encoding st.pyplot uses, so cached images look like the live ones did.
+    buffer = io.BytesIO()
+    with instrumentation.span('encode'):
+        fig.savefig(buffer, format='png', bbox_inches='tight', dpi=200)
+    return buffer.getvalue()
+
+
+def render_png(events, action_filter, player_position, territory=None):
+    with pitch_figure() as (pitch, fig, ax):
+        with instrumentation.span('draw'):
+            draw_view(pitch, fig, ax, events, action_filter, player_position, territory)
+        return encode(fig)
+
+
+def render_team_png(territories, players):
+    with pitch_figure() as (pitch, fig, ax):
+        with instrumentation.span('draw'):
+            draw_team_territory(pitch, fig, ax, territories, players)
+        return encode(fig)
+
+
+def draw_view(pitch, fig, ax, events, action_filter, player_position, territory=None):
+    """territory is the player's precomputed Territory for CONVEX HULL; built from events if None."""
+    if action_filter in layers.VIEWS:
+        layers.draw_view(pitch, ax, events, action_filter, player_position)
+
+        endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
+        fig.text(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
+
+    if action_filter == "CONVEX HULL":
+        if territory is None:
+            territory = Territory.from_events(events.all())
+        points = territory.points
+        pitch.scatter(points[:, 0], points[:, 1], color='#00FF00', s=80, edgecolors='#FFFFFF', linewidth=1, ax=ax)
+
+        # Fewer than three points, or points on a line, have no hull to draw.
+        if territory.hull is not None:
+            outline = np.vstack([territory.hull, territory.hull[:1]])
+            pitch.plot(outline[:, 0], outline[:, 1], color='#00FFFF', linewidth=3, linestyle='dashed', ax=ax)
+            pitch.polygon([territory.hull], color='#00FFFF', alpha=0.2, ax=ax)
+
+        endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
+        fig.text(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
+
+
+def draw_team_territory(pitch, fig, ax, territories, players):
+    """The trimmed hull and centroid of each player, all on one pitch."""
+    colors = colormaps['tab20'](np.linspace(0, 1, 20))
+    for i, player in enumerate(players):
+        territory = territories.get(player)
+        if territory is None or territory.centroid is None:
+            continue
+        # The darker shade of each tab20 pair first, then the lighter ones.
+        color = colors[(2 * i) % 20 + (2 * i) // 20]
+        if territory.trimmed is not None:
+            outline = np.vstack([territory.trimmed, territory.trimmed[:1]])
+            pitch.polygon([territory.trimmed], color=color, alpha=0.15, ax=ax)
+            pitch.plot(outline[:, 0], outline[:, 1], color=color, linewidth=2, ax=ax)
+        pitch.scatter(territory.trimmed_centroid[0], territory.trimmed_centroid[1], s=180, color=color, edgecolors='#FFFFFF', linewidth=1.5,
+                      label=f"{player} ({territory.trimmed_area:,.0f} m²)", ax=ax, zorder=3)
+
+    ax.legend(loc='upper left', bbox_to_anchor=(-0.25, 1.14), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=3, edgecolor='#ffffff')
+
+    endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
+    fig.text(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
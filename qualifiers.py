@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+
+from cache import read_only
+
+# Opta qualifier ids used by the views.
+LONG_BALL = 1
+CROSS = 2
+HEAD_PASS = 3
+THROUGH_BALL = 4
+FREE_KICK = 5
+CORNER = 6
+END_X = 140
+END_Y = 141
+# Its value is 'OWN_GOAL' on own goals.
+GOAL_TYPE = 280
+
+PASS_FLAGS = {
+    'long_ball': LONG_BALL,
+    'cross': CROSS,
+    'head_pass': HEAD_PASS,
+    'through_ball': THROUGH_BALL,
+    'free_kick': FREE_KICK,
+    'corner': CORNER,
+}
+
+
+class QualifierTable:
+    """Long (event, qualifierId, value) view of the qualifier/N/* columns of one match.
+
+    Rows are sorted by qualifierId and then event position, so every lookup for a
+    qualifier is a binary search for its block followed by array slicing.
+    """
+
+    def __init__(self, n_events, event, qualifier_id, value):
+        order = np.lexsort((event, qualifier_id))
+        self.n_events = n_events
+        self.event = np.asarray(event, dtype='int32')[order]
+        self.qualifier_id = np.asarray(qualifier_id, dtype='int16')[order]
+        # Value columns that pandas parsed as floats are stored as text like the rest.
+        value = pd.Series(np.asarray(value, dtype=object)[order], dtype=object)
+        missing = value.isna()
+        self.value = value.astype(str).where(~missing, None).to_numpy(dtype=object)
+        self.number = pd.to_numeric(value, errors='coerce').to_numpy(dtype='float32')
+        read_only(self.event, self.qualifier_id, self.value, self.number)
+
+    @classmethod
+    def from_frame(cls, df):
+        id_cols = [col for col in df.columns if col.startswith('qualifier/') and col.endswith('/qualifierId')]
+        if not id_cols:
+            return cls(len(df), [], [], [])
+        value_cols = [col.replace('/qualifierId', '/value') for col in id_cols]
+        ids = df[id_cols].to_numpy(dtype=float)
+        values = np.empty(ids.shape, dtype=object)
+        for i, col in enumerate(value_cols):
+            values[:, i] = df[col].to_numpy(dtype=object) if col in df.columns else None
+        present = ~np.isnan(ids)
+        event = np.broadcast_to(np.arange(len(df))[:, None], ids.shape)[present]
+        return cls(len(df), event, ids[present].astype('int16'), values[present])
+
+    def _block(self, qualifier_id):
+        start = np.searchsorted(self.qualifier_id, qualifier_id, side='left')
+        stop = np.searchsorted(self.qualifier_id, qualifier_id, side='right')
+        return slice(start, stop)
+
+    def events_with(self, qualifier_id):
+        """Sorted positions of the events that carry the qualifier."""
+        return self.event[self._block(qualifier_id)]
+
+    def has(self, qualifier_id):
+        mask = np.zeros(self.n_events, dtype=bool)
+        mask[self.events_with(qualifier_id)] = True
+        return mask
+
+    def values(self, qualifier_id, numeric=True):
+        """Value of the qualifier for every event, NaN/None where the event does not carry it."""
+        block = self._block(qualifier_id)
+        if numeric:
+            out = np.full(self.n_events, np.nan, dtype='float32')
+            out[self.event[block]] = self.number[block]
+        else:
+            out = np.full(self.n_events, None, dtype=object)
+            out[self.event[block]] = self.value[block]
+        return out
+
+    def to_frame(self):
+        return pd.DataFrame({
+            'event': self.event,
+            'qualifierId': self.qualifier_id,
+            'value': pd.Categorical(self.value),
+            'number': self.number,
+        })
+
+    @classmethod
+    def from_long_frame(cls, n_events, df):
+        return cls(n_events, df['event'].to_numpy(), df['qualifierId'].to_numpy(), df['value'].astype(object).to_numpy())
+
+    @property
+    def nbytes(self):
+        return self.event.nbytes + self.qualifier_id.nbytes + self.number.nbytes + self.value.nbytes
@@ -0,0 +1,174 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+import heatmap
+import instrumentation
+from cache import BoundedCache
+from match_loader import file_hash, load_event_index, load_starters, load_territories
+
+# Bump whenever pitch_views changes what a figure looks like, so stale images are never served.
+# The heat-map style (ISL_HEATMAP_STYLE) is part of every key and image name as well.
+STYLE_VERSION = 6
+
+RENDER_CACHE_MB = int(os.environ.get("ISL_RENDER_CACHE_MB", "64"))
+RENDER_CACHE_DIR = os.environ.get("ISL_RENDER_CACHE_DIR", ".render_cache")
+PRERENDER_DIR = os.environ.get("ISL_PRERENDER_DIR", "prerendered")
+
+ACTION_FILTERS = ["ALL ACTIONS IN THE MATCH", "PASSES & HEATMAP", "OFFENSIVE ACTIONS", "DEFENSIVE ACTIONS", "CONVEX HULL"]
+SEASON_VIEWS = ["PASSES & HEATMAP", "CONVEX HULL"]
+TEAM_VIEWS = ["TEAM TERRITORY"]
+
+_memory = BoundedCache(RENDER_CACHE_MB * 1024 * 1024)
+_manifest_lock = threading.Lock()
+_manifest = {}
+
+
+def cache_key(file_path, team, player, action_filter):
+    return (file_hash(file_path), team, player, action_filter, STYLE_VERSION, heatmap.HEATMAP_STYLE)
+
+
+def image_name(csv_hash, team, player, action_filter):
+    digest = hashlib.sha256(repr((team, player, action_filter, STYLE_VERSION, heatmap.HEATMAP_STYLE)).encode()).hexdigest()
+    return f"{csv_hash[:16]}/{digest}.png"
+
+
+def disk_path(key):
+    return os.path.join(RENDER_CACHE_DIR, image_name(*key[:4]))
+
+
+def _manifest_entry(output_dir):
+    path = os.path.join(output_dir, "manifest.json")
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    version = (mtime, heatmap.HEATMAP_STYLE)
+    with _manifest_lock:
+        cached = _manifest.get(path)
+        if cached is None or cached[0] != version:
+            with open(path, encoding='utf-8') as f:
+                manifest = json.load(f)
+            by_hash = {
+                entry['csv_hash']: entry['images']
+                for entry in manifest['matches'].values()
+                if entry.get('renderer_version') == STYLE_VERSION and entry.get('heatmap_style') == heatmap.HEATMAP_STYLE
+            }
+            cached = (version, manifest, by_hash)
+            _manifest[path] = cached
+        return cached
+
+
+def load_manifest(output_dir=PRERENDER_DIR):
+    """The batch renderer's manifest, re-read only when the file changes."""
+    entry = _manifest_entry(output_dir)
+    return entry[1] if entry else None
+
+
+def prerendered_path(key, output_dir=PRERENDER_DIR):
+    entry = _manifest_entry(output_dir)
+    if entry is None:
+        return None
+    name = entry[2].get(key[0], {}).get("|".join(key[1:4]))
+    return os.path.join(output_dir, name) if name else None
+
+
+def _read(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def get(key, disk=True):
+    """Cached PNG for the key: memory first, then the batch renderer's output, then the disk cache."""
+    png = _memory.get(key)
+    if png is not None:
+        instrumentation.count('render_memory_hit')
+        return png
+    if not disk:
+        instrumentation.count('render_miss')
+        return None
+    path = prerendered_path(key)
+    png = _read(path) if path else None
+    source = 'render_prerendered_hit'
+    if png is None:
+        png = _read(disk_path(key))
+        source = 'render_disk_hit'
+    if png is None:
+        instrumentation.count('render_miss')
+        return None
+    instrumentation.count(source)
+    return _memory.put(key, png)
+
+
+def put(key, png, disk=True):
+    _memory.put(key, png)
+    if not disk:
+        return png
+    path = disk_path(key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write to a temp file of our own, then rename, so a concurrent reader never sees half a
+    # PNG; sessions are threads of one process, so the pid alone would not keep it private.
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(png)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return png
+
+
+def render_view(file_path, team, player, action_filter, window=None):
+    """PNG bytes for one player's view of a match, drawn with matplotlib only on a cache miss.
+
+    window (from Timeline.window) limits the view to part of the match; it is part of the key.
+    Windowed views are kept in memory only: there is no end to the windows a visitor can pick,
+    and the disk cache is never evicted.
+    """
+    key = cache_key(file_path, team, player, action_filter if window is None else f"{action_filter} @ {window}")
+    png = get(key, disk=window is None)
+    if png is None:
+        # Imported here so cache hits never load matplotlib.
+        import pitch_views
+
+        with instrumentation.span('render'):
+            index = load_event_index(file_path)
+            player_rows = index.player(player).all()
+            player_position = player_rows['Position'].iloc[0] if len(player_rows) else None
+            # The precomputed territory covers the whole match; a window's is built from its events.
+            territory = load_territories(file_path).get(player) if window is None else None
+            png = put(key, pitch_views.render_png(index.player(player, window), action_filter, player_position, territory),
+                      disk=window is None)
+    return png
+
+
+def render_team_view(file_path, team):
+    """PNG bytes of the territories of a team's starters, all on one pitch."""
+    key = cache_key(file_path, team, "", TEAM_VIEWS[0])
+    png = get(key)
+    if png is None:
+        import pitch_views
+
+        with instrumentation.span('render'):
+            players = load_starters(file_path).get(team, ())
+            png = put(key, pitch_views.render_team_png(load_territories(file_path), players))
+    return png
+
+
+def render_season_view(season, team, player, view):
+    """PNG bytes for one player's view of the whole season, keyed by the set of match hashes."""
+    key = (season.key, team, player, view, STYLE_VERSION, heatmap.HEATMAP_STYLE)
+    png = get(key)
+    if png is None:
+        import pitch_views
+
+        with instrumentation.span('render'):
+            events = season.player(team, player)
+            png = put(key, pitch_views.render_png(events, view, events.position()))
+    return png
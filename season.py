@@ -0,0 +1,213 @@
+"""Season-wide player aggregation over every match in Matches/.
+
+Each match is reduced once to a partial result (its players' events and per-player
+counts and minutes), stored on disk under its CSV hash. A season view only computes the
+partials it does not have yet, in parallel across cores, and merges them, so adding a
+match costs one file's work.
+"""
+import hashlib
+import multiprocessing
+import os
+import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from match_loader import file_hash, load_event_index, load_match
+
+MATCHES_DIR = "Matches"
+SEASON_CACHE_DIR = os.environ.get("ISL_SEASON_CACHE_DIR", os.path.join(".season_cache", "partials"))
+# Bump when build_partial changes what a partial holds.
+PARTIAL_VERSION = 3
+
+EVENT_COLUMNS = ['playerName', 'teamName', 'Position', 'typeId', 'outcome', 'x', 'y', 'end_x', 'end_y', 'keyPass', 'assist', 'own_goal']
+NAME_COLUMNS = ['playerName', 'teamName', 'Position']
+
+# Column name -> (typeIds, outcome) or flag column counted for the per-90 table.
+SEASON_COUNTS = {
+    'Passes': ((1,), None),
+    'Completed Passes': ((1,), 1),
+    'Key Passes': 'keyPass',
+    'Assists': 'assist',
+    'Shots': ((13, 14, 15, 16), None),
+    'Goals': ((16,), None),
+    'Dribbles': ((3,), 1),
+    'Tackles Won': ((7,), 1),
+    'Interceptions': ((8,), None),
+    'Blocks': ((10,), None),
+    'Clearances': ((12,), None),
+    'Ball Recoveries': ((49,), None),
+    'Aerials Won': ((44,), 1),
+    'Fouls Won': ((4,), 1),
+    'Fouls Committed': ((4,), 0),
+}
+
+_lock = threading.Lock()
+_partials = {}
+_season = {}
+
+
+def minutes_played(df):
+    """Minutes on the pitch per player, from kick-off or a sub on (19) to full time or a sub off (18)."""
+    played = df[df['periodId'].isin([1, 2, 3, 4])]
+    full_time = int(played['timeMin'].max()) if len(played) else 90
+    players = df.dropna(subset=['playerName'])
+    came_on = players[players['typeId'] == 19].groupby('playerName', observed=True)['timeMin'].min()
+    went_off = players[players['typeId'] == 18].groupby('playerName', observed=True)['timeMin'].max()
+    names = players['playerName'].astype(object).unique()
+    start = came_on.reindex(names).fillna(0).to_numpy()
+    end = went_off.reindex(names).fillna(full_time).to_numpy()
+    return pd.Series(np.clip(end - start, 0, None), index=names)
+
+
+def build_partial(file_path):
+    """Reduce one match to what the season views need; runs in worker processes."""
+    df = load_match(file_path)
+    index = load_event_index(file_path)
+    minutes = minutes_played(df)
+    rows = []
+    for (team, player), _ in df.groupby(['teamName', 'playerName'], observed=True):
+        row = {'team': team, 'player': player, 'matches': 1, 'minutes': minutes.get(player, 0)}
+        for name, spec in SEASON_COUNTS.items():
+            if isinstance(spec, str):
+                row[name] = len(index.flag_rows(player, spec))
+            else:
+                type_ids, outcome = spec
+                row[name] = sum(len(index.rows(player, type_id, outcome)) for type_id in type_ids)
+        # Own goals are typeId 16 too, but they are not the player's shots or goals.
+        own_goals = len(index.flag_rows(player, 'own_goal'))
+        row['Shots'] -= own_goals
+        row['Goals'] -= own_goals
+        rows.append(row)
+    events = df.loc[df['playerName'].notna(), EVENT_COLUMNS].copy()
+    # Kept categorical, so a cached partial holds codes rather than one string per event.
+    for col in NAME_COLUMNS:
+        events[col] = events[col].astype('category').cat.remove_unused_categories()
+    return {'events': events, 'players': pd.DataFrame(rows)}
+
+
+def _partial_path(csv_hash):
+    return os.path.join(SEASON_CACHE_DIR, f"{csv_hash}.v{PARTIAL_VERSION}.pkl")
+
+
+def _read_partial(csv_hash):
+    partial = _partials.get(csv_hash)
+    if partial is None:
+        try:
+            with open(_partial_path(csv_hash), 'rb') as f:
+                partial = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        _partials[csv_hash] = partial
+    return partial
+
+
+def _write_partial(csv_hash, partial):
+    _partials[csv_hash] = partial
+    path = _partial_path(csv_hash)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        pickle.dump(partial, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def warm_partial(file_path):
+    """Build and store the match's partial now if it is missing, e.g. when a new match is ingested."""
+    csv_hash = file_hash(file_path)
+    with _lock:
+        if _read_partial(csv_hash) is None:
+            _write_partial(csv_hash, build_partial(file_path))
+
+
+class Season:
+    """Merged partials of every match: all players' events plus season totals per player."""
+
+    def __init__(self, key, partials):
+        self.key = key
+        self.events = pd.concat([p['events'] for p in partials], ignore_index=True)
+        # Each match has its own categories; merge them rather than going through strings.
+        for col in NAME_COLUMNS:
+            self.events[col] = union_categoricals([p['events'][col] for p in partials])
+        players = pd.concat([p['players'] for p in partials], ignore_index=True)
+        self.totals = players.groupby(['team', 'player'], sort=True).sum(numeric_only=True)
+
+    def teams(self):
+        return list(self.totals.index.get_level_values('team').unique())
+
+    def players(self, team):
+        return list(self.totals.loc[team].index)
+
+    def player(self, team, player):
+        return SeasonPlayerEvents(self, team, player)
+
+    def per90(self, team, player):
+        totals = self.totals.loc[(team, player)]
+        minutes = totals['minutes']
+        counts = totals[list(SEASON_COUNTS)]
+        return pd.DataFrame({
+            'Total': counts.astype(int),
+            'Per 90': (counts * 90 / minutes).round(2) if minutes else np.nan,
+        })
+
+
+class SeasonPlayerEvents:
+    """One player's season events, with the same subset methods the match views use."""
+
+    def __init__(self, season, team, player):
+        self.key = (season.key, team, player)
+        events = season.events
+        self._rows = events[(events['teamName'] == team) & (events['playerName'] == player)]
+
+    def all(self):
+        return self._rows
+
+    def type(self, type_id, outcome=None):
+        rows = self._rows
+        mask = rows['typeId'] == type_id
+        if outcome is not None:
+            mask &= rows['outcome'] == outcome
+        return rows[mask]
+
+    def flag(self, flag):
+        return self._rows[self._rows[flag] == 1]
+
+    def position(self):
+        positions = self._rows['Position'].dropna()
+        return positions.mode().iloc[0] if len(positions) else None
+
+
+def load_season(matches_dir=MATCHES_DIR, workers=None, names=None):
+    """The season over the given match names (default: every CSV in matches_dir)."""
+    if names is None:
+        names = [name[:-len(".csv")] for name in os.listdir(matches_dir) if name.endswith(".csv")]
+    files = sorted(os.path.join(matches_dir, f"{name}.csv") for name in names)
+    hashes = [file_hash(file_path) for file_path in files]
+    key = hashlib.sha256("".join(sorted(hashes)).encode()).hexdigest()
+    with _lock:
+        season = _season.get(key)
+        if season is not None:
+            return season
+
+        missing = [(file_path, csv_hash) for file_path, csv_hash in zip(files, hashes) if _read_partial(csv_hash) is None]
+        if len(missing) > 1 and (workers or os.cpu_count() or 1) > 1:
+            # Never fork: the app's other sessions are threads that may hold locks at that moment.
+            context = multiprocessing.get_context("forkserver")
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+                built = pool.map(build_partial, [file_path for file_path, _ in missing])
+                for (_, csv_hash), partial in zip(missing, built):
+                    _write_partial(csv_hash, partial)
+        else:
+            for file_path, csv_hash in missing:
+                _write_partial(csv_hash, build_partial(file_path))
+
+        # Only the newest season is kept; older merges are superseded by it.
+        _season.clear()
+        season = _season[key] = Season(key, [_partials[csv_hash] for csv_hash in hashes])
+        # The season holds the merged data now; partials of removed or rewritten files are not needed again.
+        for csv_hash in set(_partials) - set(hashes):
+            del _partials[csv_hash]
+        return season
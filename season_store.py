@@ -0,0 +1,145 @@
+"""Columnar season store built from the CSV files in Matches/.
+
+Run `python season_store.py` after adding or changing match files. It writes two
+uncompressed Arrow/Feather tables, one with every decoded event of the season and one
+with the long (event, qualifierId, value) qualifier rows, both sorted by match, so the
+app can memory-map them and slice out a single match without reading the rest. The
+slice itself copies nothing, but turning it into the app's pandas frame copies every
+column of that match's rows; there is no column projection, since match_loader caches
+the whole frame once and every view shares it.
+"""
+import argparse
+import json
+import os
+import re
+import threading
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+import match_loader
+from qualifiers import QualifierTable
+
+MATCHES_DIR = "Matches"
+STORE_DIR = "store"
+STORE_PATH = os.path.join(STORE_DIR, "season.feather")
+QUALIFIER_STORE_PATH = os.path.join(STORE_DIR, "qualifiers.feather")
+STORE_VERSION = 2
+
+_store_lock = threading.Lock()
+_store = {}
+
+
+def match_number(file_name):
+    found = re.match(r"Match (\d+)", os.path.basename(file_name))
+    return int(found.group(1)) if found else -1
+
+
+def source_signature(file_path):
+    stat = os.stat(file_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _write(frames, sources, store_path):
+    season = pd.concat(frames, ignore_index=True)
+    season['match_id'] = season['match_id'].astype('int16')
+    # Categories differ per match, so rebuild them once over the whole season.
+    for col in season.select_dtypes(['category', 'object']).columns:
+        season[col] = pd.Categorical(season[col].astype(object))
+    table = pa.Table.from_pandas(season, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'season_store'] = json.dumps({'version': STORE_VERSION, 'sources': sources}).encode()
+    table = table.replace_schema_metadata(metadata)
+
+    os.makedirs(os.path.dirname(store_path) or ".", exist_ok=True)
+    tmp_path = store_path + ".tmp"
+    feather.write_feather(table, tmp_path, compression='uncompressed')
+    os.replace(tmp_path, store_path)
+    return table.num_rows
+
+
+def build(matches_dir=MATCHES_DIR, store_path=STORE_PATH, qualifier_store_path=QUALIFIER_STORE_PATH):
+    files = sorted(
+        (os.path.join(matches_dir, name) for name in os.listdir(matches_dir) if name.endswith(".csv")),
+        key=match_number,
+    )
+    events, qualifier_rows = [], []
+    event_sources, qualifier_sources = {}, {}
+    event_offset = qualifier_offset = 0
+    for file_path in files:
+        name = os.path.basename(file_path)
+        signature = source_signature(file_path)
+        df, table = match_loader.read_csv(file_path)
+        long_frame = table.to_frame()
+        df.insert(0, 'match_id', match_number(file_path))
+        long_frame.insert(0, 'match_id', match_number(file_path))
+        events.append(df)
+        qualifier_rows.append(long_frame)
+        event_sources[name] = {'signature': signature, 'offset': event_offset, 'length': len(df)}
+        qualifier_sources[name] = {'signature': signature, 'offset': qualifier_offset, 'length': len(long_frame)}
+        event_offset += len(df)
+        qualifier_offset += len(long_frame)
+
+    rows = _write(events, event_sources, store_path)
+    _write(qualifier_rows, qualifier_sources, qualifier_store_path)
+    return rows, len(files)
+
+
+def open_store(store_path=STORE_PATH):
+    """Memory-map a store table once per version of the file; returns (table, sources) or None."""
+    try:
+        signature = source_signature(store_path)
+    except OSError:
+        return None
+    with _store_lock:
+        cached = _store.get(store_path)
+        if cached is None or cached[0] != signature:
+            table = feather.read_table(store_path, memory_map=True)
+            info = json.loads(table.schema.metadata[b'season_store'])
+            if info.get('version') != STORE_VERSION:
+                return None
+            cached = (signature, table, info['sources'])
+            _store[store_path] = cached
+        return cached[1], cached[2]
+
+
+def read_table(file_path, store_path=STORE_PATH):
+    """Arrow slice of one match (a view of the mapped file), or None when the store is missing or stale for it."""
+    opened = open_store(store_path)
+    if opened is None:
+        return None
+    table, sources = opened
+    source = sources.get(os.path.basename(file_path))
+    if source is None or source['signature'] != source_signature(file_path):
+        return None
+    return table.slice(source['offset'], source['length'])
+
+
+def _to_pandas(table):
+    """Copy of the slice as a pandas frame."""
+    df = table.to_pandas().drop(columns='match_id', errors='ignore')
+    # The dictionaries cover the whole season; keep only this match's names.
+    for col in df.select_dtypes('category').columns:
+        df[col] = df[col].cat.remove_unused_categories()
+    return df
+
+
+def read_match(file_path, store_path=STORE_PATH, qualifier_store_path=QUALIFIER_STORE_PATH):
+    """Decoded (events, qualifiers) for one match, or None when either table cannot serve it."""
+    events = read_table(file_path, store_path)
+    qualifier_rows = read_table(file_path, qualifier_store_path)
+    if events is None or qualifier_rows is None:
+        return None
+    df = _to_pandas(events)
+    return df, QualifierTable.from_long_frame(len(df), _to_pandas(qualifier_rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the columnar season store from the match CSV files.")
+    parser.add_argument("--matches-dir", default=MATCHES_DIR)
+    parser.add_argument("--output", default=STORE_PATH)
+    parser.add_argument("--qualifier-output", default=QUALIFIER_STORE_PATH)
+    args = parser.parse_args()
+    rows, matches = build(args.matches_dir, args.output, args.qualifier_output)
+    print(f"Wrote {rows} events from {matches} matches to {args.output}")
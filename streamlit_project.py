@@ -1,13 +1,21 @@
-import json
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-import glob
 import os
-from mplsoccer import VerticalPitch
-from scipy.spatial import ConvexHull
-from natsort import natsorted
+import ingest_worker
+import instrumentation
+from match_index import load_index, match_names
+from match_loader import load_starters, load_territories, load_timeline
+from render_cache import ACTION_FILTERS, SEASON_VIEWS, TEAM_VIEWS, render_season_view, render_team_view, render_view
+from territory import summary
+from season import load_season
+
+instrumentation.begin_rerun(instrumentation.DEBUG or st.query_params.get("debug") == "1")
+
+def show_debug():
+    trace = instrumentation.end_rerun()
+    if trace:
+        with st.expander("Debug"):
+            st.json(trace)
 
 if "selected_match" not in st.session_state:
     st.session_state.selected_match = ""
@@ -19,11 +27,47 @@ st.title("Indian Super League 2024-25")
 st.subheader("Visualizing the Actions, Passes and Heat Map of all players in the match.")
 
 MATCHES_DIR = "Matches"  # Directory containing match CSV files
-match_files = glob.glob(os.path.join(MATCHES_DIR, "*.csv"))
-match_names = [os.path.basename(file).replace(".csv", "") for file in match_files]
 
-if match_names:
-    selected_match = st.selectbox("Select A Match -", sorted(match_names, reverse = True))
+# New match files are decoded and pre-rendered in the background; until then they are not listed.
+ingest = ingest_worker.start(MATCHES_DIR) if ingest_worker.ENABLED else None
+with instrumentation.span('load_index'):
+    match_index = load_index(MATCHES_DIR, ready=ingest.ready if ingest else None)
+
+mode = st.radio("Select View -", ["Single Match", "Season"], horizontal=True)
+# Interactive charts are drawn in the browser; the image is still there to download.
+render_mode = st.radio("Render As -", ["Image", "Interactive"], horizontal=True)
+
+if mode == "Season":
+    with instrumentation.span('load_season'):
+        season = load_season(MATCHES_DIR, names=list(match_index))
+    selected_team = st.selectbox("Select Team -", season.teams())
+    player = st.selectbox(f"Select a Player from {selected_team} -", season.players(selected_team))
+    season_view = st.radio("Select Season View -", SEASON_VIEWS, horizontal=True)
+
+    totals = season.totals.loc[(selected_team, player)]
+    st.write(f"**Matches:** {int(totals['matches'])} | **Minutes:** {int(totals['minutes'])}")
+
+    if player and render_mode == "Interactive":
+        # Imported here so the app starts, and serves cached images, without loading matplotlib.
+        from interactive_views import season_chart
+
+        with instrumentation.span('interactive_chart'):
+            frame, chart = season_chart(season, selected_team, player, season_view)
+            st.vega_lite_chart(frame, chart, theme=None)
+        st.download_button("Download Image", lambda: render_season_view(season, selected_team, player, season_view),
+                           file_name=f"{player} - Season - {season_view}.png", mime="image/png")
+    elif player:
+        with instrumentation.span('render_view'):
+            png = render_season_view(season, selected_team, player, season_view)
+        with instrumentation.span('st.image'):
+            st.image(png, width="stretch")
+    if player:
+        st.dataframe(season.per90(selected_team, player))
+    show_debug()
+    st.stop()
+
+if match_index:
+    selected_match = st.selectbox("Select A Match -", match_names(match_index))
     
     if selected_match != st.session_state.selected_match:
         st.session_state.selected_match = selected_match
@@ -32,34 +76,21 @@ if match_names:
     file_path = os.path.join(MATCHES_DIR, f"{selected_match}.csv")
     
     if os.path.exists(file_path):
-        df = pd.read_csv(file_path)
-        qualifier_id_cols = [col for col in df.columns if "/qualifierId" in col]
-        qualifier_value_cols = [col.replace("/qualifierId", "/value") for col in qualifier_id_cols]
+        match_info = match_index[selected_match]
         
-        df['end_x'] = np.nan
-        df['end_y'] = np.nan
-        
-        for id_col, value_col in zip(qualifier_id_cols, qualifier_value_cols):
-            df.loc[df[id_col] == 140, 'end_x'] = df[value_col]
-            df.loc[df[id_col] == 141, 'end_y'] = df[value_col]
-        
-        teams = df['teamName'].unique()
+        teams = match_info['teams']
         
         if len(teams) == 2:
             team1, team2 = teams
             selected_team = st.radio("Select Team -", [team1, team2])
-            team_players = df[df['teamName'] == selected_team]['playerName'].dropna().sort_values().unique()
+            team_players = match_info['players'][selected_team]
             player = st.selectbox(f"Select a Player from {selected_team} -", team_players)
-            player_position = df[df['playerName'] == player]['Position'].iloc[0] if player else None
 
             st.write(f"**Selected Match:** {selected_match}")
             st.write(f"**Selected Team:** {selected_team}")
             st.write(f"**Selected Player:** {player}")
 
-            filtered_data = df[df['playerName'] == player]
-
-            action_filters = ["All Actions", "Heat Map & Passes", "Offensive Actions", "Defensive Actions", "Convex Hull"]
-            col1, col2, col3, col4, col5 = st.columns(5)
+            col1, col2, col3, col4, col5, col6 = st.columns(6)
 
             if col1.button("ALL ACTIONS IN THE MATCH"):
                 st.session_state.action_filter = "ALL ACTIONS IN THE MATCH"
@@ -71,382 +102,50 @@ if match_names:
                 st.session_state.action_filter = "DEFENSIVE ACTIONS"
             if col5.button("CONVEX HULL"):
                 st.session_state.action_filter = "CONVEX HULL"
-
-        pitch = VerticalPitch(pitch_type='opta', pitch_color='black', line_color='white', linewidth=3, corner_arcs=True)
-        fig, ax = pitch.draw(figsize=(10, 10), constrained_layout=True, tight_layout=False)
-        fig.set_facecolor('black')
-
-        action_filter = st.session_state.action_filter
-
-        if action_filter == "ALL ACTIONS IN THE MATCH":
-            goal = filtered_data[filtered_data['typeId'] == 16]
-
-            qualifier_columns = [col for col in goal.columns if col.startswith('qualifier/') and col.endswith('/value')]
-
-            if qualifier_columns:
-                own_goal = goal[goal[qualifier_columns].apply(lambda row: 'OWN_GOAL' in row.values, axis=1)]
-            else:
-                own_goal = pd.DataFrame()
-
-            # Ensure x and y exist to prevent KeyError
-            if own_goal.empty or 'x' not in own_goal.columns or 'y' not in own_goal.columns:
-                own_goal = pd.DataFrame({'x': [], 'y': []})  # Empty DataFrame to prevent errors
-                
-            shot_miss = filtered_data[filtered_data['typeId'] == 13]
-            shot_post = filtered_data[filtered_data['typeId'] == 14]
-            shot_saved = filtered_data[filtered_data['typeId'] == 15]
-                
-            assist = filtered_data[filtered_data['assist'] == 1]
-            chance = filtered_data[filtered_data['keyPass'] == 1]
-            passes = filtered_data[filtered_data['typeId'] == 1]
-            passes_successful = passes[(passes['outcome'] == 1) & ~(passes['eventId'].isin(chance['eventId']))]
-            passes_unsuccessful = passes[passes['outcome'] == 0]
-                
-            recovery = filtered_data[filtered_data['typeId'] == 49]
-            offside = filtered_data[filtered_data['typeId'] == 55]
-            shield = filtered_data[filtered_data['typeId'] == 56]
-                
-            tackle = filtered_data[filtered_data['typeId'] == 7]
-            succ_tackle = tackle[tackle['outcome'] == 1]
-                
-            interception = filtered_data[filtered_data['typeId'] == 8]
-            block = filtered_data[filtered_data['typeId'] == 10]
-            clearance = filtered_data[filtered_data['typeId'] == 12]
-                
-            foul = filtered_data[filtered_data['typeId'] == 4]
-            foul_won = foul[foul['outcome'] == 1]
-            foul_committed = foul[foul['outcome'] == 0]
-                
-            dribble = filtered_data[filtered_data['typeId'] == 3]
-            succ_dribble = dribble[dribble['outcome'] == 1]
-                
-            aerial = filtered_data[filtered_data['typeId'] == 44]
-            aerial_won = aerial[aerial['outcome'] == 1]
-            aerial_lost = aerial[aerial['outcome'] == 0]
-
-            dispossessed = filtered_data[filtered_data['typeId'] == 50]
-
-            dribbled_past = filtered_data[filtered_data['typeId'] == 45]
-                
-            pickup = filtered_data[filtered_data['typeId'] == 52]
-            punch = filtered_data[filtered_data['typeId'] == 41]
-
-            for df_subset in [assist, chance, passes, passes_successful, passes_unsuccessful]:
-                df_subset[['x', 'y', 'end_x', 'end_y']] = df_subset[['x', 'y', 'end_x', 'end_y']].astype(float)
-
-            if player_position == 'Goalkeeper':
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-                pitch.arrows(passes_successful.x, passes_successful.y, passes_successful.end_x, passes_successful.end_y, width=0.75, color='#00ff00', ax=ax, label='Completed Pass')
-                pitch.arrows(passes_unsuccessful.x, passes_unsuccessful.y, passes_unsuccessful.end_x, passes_unsuccessful.end_y, width=0.75, color='red', ax=ax, label='Incomplete Pass')
-                plt.scatter(block['y'], block['x'], s = 200, c = '#00ff00', marker = '*', edgecolor = '#000000', label ='Save')
-                plt.scatter(punch['y'], punch['x'], s = 100, c = '#ffec00', marker = 'o', edgecolor = '#000000', label = 'Punch')
-                plt.scatter(pickup['y'], pickup['x'], s = 120, c = '#dd571c', marker = '+', edgecolor = '#000000', label = 'Pick-Up')
-                plt.scatter(tackle['y'], tackle['x'], s= 130,c = '#bebebe', marker = 'H', edgecolor = '#000000', label = 'Tackle')
-                plt.scatter(recovery['y'], recovery['x'], s= 130, c = '#fcd200', marker = 'H', edgecolor = '#000000', label = 'Ball Recovery')
-                plt.scatter(interception['y'], interception['x'], s = 130, c = '#ff007f', marker = 'H', edgecolor = '#000000', label = 'Interception')
-                plt.scatter(clearance['y'], clearance['x'], s = 100, c = '#9999ff', marker = 'x', edgecolor = '#000000', label = 'Clearance')
-                plt.scatter(shield['y'], shield['x'], s = 50, c = '#dd571c', marker = 'D', edgecolor = '#000000', label = 'Shielding Ball Out')
-                plt.scatter(succ_dribble['y'], succ_dribble['x'], s= 200, c = '#009afd', marker = '*', edgecolor = '#000000', label = 'Dribble')
-                plt.scatter(foul_won['y'], foul_won['x'], s= 120, c = '#008000', marker = 'X', edgecolor = '#000000', label = 'Foul Won')
-                plt.scatter(foul_committed['y'], foul_committed['x'], s= 120, c = '#c21919', marker = 'X', edgecolor = '#000000', label = 'Foul Committed')
-                plt.scatter(dispossessed['y'], dispossessed['x'], s = 100, c = '#cb0000', marker = 'p', edgecolor = '#000000', label = 'Dispossessed')
-                plt.scatter(dribbled_past['y'], dribbled_past['x'], s = 50, c = '#cb0000', marker = 'x', edgecolor = '#000000', label = 'Dribbled Past')
-                plt.scatter(own_goal['x'], own_goal['y'], s=120, c='red', edgecolor='orange', label='Own Goal')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(-0.19, 1.12), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=4, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-   
-                if player or selected_team:
-                    st.pyplot(fig)
-                    plt.close(fig)
-
-            else:
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-
-                pitch.scatter(goal['x'], goal['y'], s=120, c='#06402b', edgecolors='#00ff00', label='Goal', marker = 'football', ax=ax)
-                pitch.scatter(shot_saved['x'], shot_saved['y'], s=120, c='#ff7c60', edgecolors='#000000', label='Saved/Blocked Shot', marker = 'football', ax=ax)
-                pitch.scatter(shot_post['x'], shot_post['y'], s=120, c='w', edgecolors='#000000', label='Shot Off Woodwork', marker = 'football', ax=ax)
-                pitch.scatter(shot_miss['x'], shot_miss['y'], s=120, c='r', edgecolors='#000000', label='Shot Off Target', marker = 'football', ax=ax)
-
-                pitch.lines(assist.x, assist.y, assist.end_x, assist.end_y, color='#00ff00', comet = True, lw = 2.5, ax=ax, label='Assist')
-                ax.scatter(assist['end_y'], assist['end_x'], s=50, c='black', edgecolor='#00ff00')
-
-                pitch.lines(chance.x, chance.y, chance.end_x, chance.end_y, color='#ffea00', comet = True, lw = 2.5, ax=ax, label='Key Pass')
-                ax.scatter(chance['end_y'], chance['end_x'], s=50, c='black', edgecolor='#ffea00')
-
-                pitch.arrows(passes_successful.x, passes_successful.y, passes_successful.end_x, passes_successful.end_y, width=0.6, headwidth=5, headlength=5, color='#00ff00', ax=ax, label='Completed Pass')
-                pitch.arrows(passes_unsuccessful.x, passes_unsuccessful.y, passes_unsuccessful.end_x, passes_unsuccessful.end_y, width=0.6, headwidth=5, headlength=5, color='red', ax=ax, label='Incomplete Pass')
-
-                plt.scatter(succ_dribble['y'], succ_dribble['x'], s= 200, c = '#009afd', marker = '*', edgecolor = '#000000', label = 'Dribble') #fc3900
-                plt.scatter(tackle['y'], tackle['x'], s= 130,c = '#bebebe', marker = 'H', edgecolor = '#000000', label = 'Tackle')
-                plt.scatter(recovery['y'], recovery['x'], s= 130, c = '#fcd200', marker = 'H', edgecolor = '#000000', label = 'Ball Recovery')
-                plt.scatter(block['y'], block['x'], s = 130, c = 'cyan', marker = 'H', edgecolor = '#000000', label ='Block') #009afd
-                plt.scatter(interception['y'], interception['x'], s = 130, c = '#ff007f', marker = 'H', edgecolor = '#000000', label = 'Interception')
-                plt.scatter(clearance['y'], clearance['x'], s = 100, c = '#9999ff', marker = 'x', edgecolor = '#000000', label = 'Clearance')
-                plt.scatter(offside['y'], offside['x'], s= 120, c = '#fcd200', marker = 'P', edgecolor = '#000000', label = 'Offside Provoked')
-                plt.scatter(shield['y'], shield['x'], s = 50, c = '#dd571c', marker = 'D', edgecolor = '#000000', label = 'Shielding Ball Out')
-                plt.scatter(foul_won['y'], foul_won['x'], s= 120, c = '#008000', marker = 'X', edgecolor = '#000000', label = 'Foul Won')
-                plt.scatter(foul_committed['y'], foul_committed['x'], s= 120, c = '#c21919', marker = 'X', edgecolor = '#000000', label = 'Foul Committed')
-                plt.scatter(aerial_won['y'], aerial_won['x'], s = 100, c = '#008000', marker = '^', edgecolor = '#000000', label = 'Aerial Won')
-                plt.scatter(aerial_lost['y'], aerial_lost['x'], s = 100, c = '#c21919', marker = '^', edgecolor = '#000000', label = 'Aerial Lost')
-                plt.scatter(dispossessed['y'], dispossessed['x'], s = 100, c = '#cb0000', marker = 'p', edgecolor = '#000000', label = 'Dispossessed')
-                plt.scatter(dribbled_past['y'], dribbled_past['x'], s = 50, c = '#cb0000', marker = 'x', edgecolor = '#000000', label = 'Dribbled Past')
-                plt.scatter(own_goal['y'], own_goal['x'], s=120, c='red', edgecolor='orange', label='Own Goal')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(-0.23, 1.17), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=4, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-                
-                if player or selected_team:
-                    st.pyplot(fig)
-                    plt.close(fig)
-
-        if action_filter == "PASSES & HEATMAP":
-            passes = filtered_data[filtered_data['typeId'] == 1]
-            passes_successful = passes[passes['outcome'] == 1]
-            passes_unsuccessful = passes[passes['outcome'] == 0]
-            assist = filtered_data[filtered_data['assist'] == 1]
-            chance = filtered_data[filtered_data['keyPass'] == 1]
-
-            for df_subset in [assist, chance, passes, passes_successful, passes_unsuccessful]:
-                df_subset[['x', 'y', 'end_x', 'end_y']] = df_subset[['x', 'y', 'end_x', 'end_y']].astype(float)
-
-            if player_position == 'Goalkeeper':
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-                pitch.arrows(passes_successful.x, passes_successful.y, passes_successful.end_x, passes_successful.end_y, width=0.75, color='#00ff00', ax=ax, label='Completed Pass')
-                pitch.arrows(passes_unsuccessful.x, passes_unsuccessful.y, passes_unsuccessful.end_x, passes_unsuccessful.end_y, width=0.75, color='red', ax=ax, label='Incomplete Pass')
-
-                pitch.lines(assist.x, assist.y, assist.end_x, assist.end_y, color='#00ff00', comet = True, lw = 2.5, ax=ax, label='Assist')
-                ax.scatter(assist['end_y'], assist['end_x'], s=50, c='black', edgecolor='#00ff00')
-
-                pitch.lines(chance.x, chance.y, chance.end_x, chance.end_y, color='#ffea00', comet = True, lw = 2.5, ax=ax, label='Key Pass')
-                ax.scatter(chance['end_y'], chance['end_x'], s=50, c='black', edgecolor='#ffea00')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(0.205, 1.06), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=2, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-                st.pyplot(fig)
-
-            else:
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-                pitch.arrows(passes_successful.x, passes_successful.y, passes_successful.end_x, passes_successful.end_y, width=0.6, headwidth=5, headlength=5, color='#00ff00', ax=ax, label='Completed Pass')
-                pitch.arrows(passes_unsuccessful.x, passes_unsuccessful.y, passes_unsuccessful.end_x, passes_unsuccessful.end_y, width=0.6, headwidth=5, headlength=5, color='red', ax=ax, label='Incomplete Pass')
-
-                pitch.lines(assist.x, assist.y, assist.end_x, assist.end_y, color='#00ff00', comet = True, lw = 2.5, ax=ax, label='Assist')
-                ax.scatter(assist['end_y'], assist['end_x'], s=50, c='black', edgecolor='#00ff00')
-
-                pitch.lines(chance.x, chance.y, chance.end_x, chance.end_y, color='#ffea00', comet = True, lw = 2.5, ax=ax, label='Key Pass')
-                ax.scatter(chance['end_y'], chance['end_x'], s=50, c='black', edgecolor='#ffea00')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(0.205, 1.06), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=2, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-                st.pyplot(fig)
-
-        if action_filter == "OFFENSIVE ACTIONS":
-            goal = filtered_data[filtered_data['typeId'] == 16]
-            shot_miss = filtered_data[filtered_data['typeId'] == 13]
-            shot_post = filtered_data[filtered_data['typeId'] == 14]
-            shot_saved = filtered_data[filtered_data['typeId'] == 15]
-                
-            assist = filtered_data[filtered_data['assist'] == 1]
-            chance = filtered_data[filtered_data['keyPass'] == 1]
-            passes = filtered_data[filtered_data['typeId'] == 1]
-
-            dribble = filtered_data[filtered_data['typeId'] == 3]
-            succ_dribble = dribble[dribble['outcome'] == 1]
-
-            foul = filtered_data[filtered_data['typeId'] == 4]
-            foul_won = foul[foul['outcome'] == 1]
-            foul_committed = foul[foul['outcome'] == 0]
-                
-            aerial = filtered_data[filtered_data['typeId'] == 44]
-            aerial_won = aerial[aerial['outcome'] == 1]
-            aerial_lost = aerial[aerial['outcome'] == 0]
-
-            dispossessed = filtered_data[filtered_data['typeId'] == 50]
-
-            for df_subset in [assist, chance, dribble, succ_dribble]:
-                df_subset[['x', 'y', 'end_x', 'end_y']] = df_subset[['x', 'y', 'end_x', 'end_y']].astype(float)
-
-            if player_position == 'Goalkeeper':
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-                pitch.scatter(goal['x'], goal['y'], s=120, c='#06402b', edgecolors='#00ff00', label='Goal', marker = 'football', ax=ax)
-                pitch.scatter(shot_saved['x'], shot_saved['y'], s=120, c='#ff7c60', edgecolors='#000000', label='Saved/Blocked Shot', marker = 'football', ax=ax)
-                pitch.scatter(shot_post['x'], shot_post['y'], s=120, c='w', edgecolors='#000000', label='Shot Off Woodwork', marker = 'football', ax=ax)
-                pitch.scatter(shot_miss['x'], shot_miss['y'], s=120, c='r', edgecolors='#000000', label='Shot Off Target', marker = 'football', ax=ax)
-                pitch.lines(assist.x, assist.y, assist.end_x, assist.end_y, color='#00ff00', comet = True, lw = 2.5, ax=ax, label='Assist')
-                ax.scatter(assist['end_y'], assist['end_x'], s=50, c='black', edgecolor='#00ff00')
-
-                pitch.lines(chance.x, chance.y, chance.end_x, chance.end_y, color='#ffea00', comet = True, lw = 2.5, ax=ax, label='Key Pass')
-                ax.scatter(chance['end_y'], chance['end_x'], s=50, c='black', edgecolor='#ffea00')
-
-                plt.scatter(succ_dribble['y'], succ_dribble['x'], s= 200, c = '#009afd', marker = '*', edgecolor = '#000000', label = 'Dribble')
-
-                plt.scatter(foul_won['y'], foul_won['x'], s= 120, c = '#008000', marker = 'X', edgecolor = '#000000', label = 'Foul Won')
-                plt.scatter(foul_committed['y'], foul_committed['x'], s= 120, c = '#c21919', marker = 'X', edgecolor = '#000000', label = 'Foul Committed')
-                plt.scatter(aerial_won['y'], aerial_won['x'], s = 100, c = '#008000', marker = '^', edgecolor = '#000000', label = 'Aerial Won')
-                plt.scatter(aerial_lost['y'], aerial_lost['x'], s = 100, c = '#c21919', marker = '^', edgecolor = '#000000', label = 'Aerial Lost')
-                plt.scatter(dispossessed['y'], dispossessed['x'], s = 100, c = '#cb0000', marker = 'p', edgecolor = '#000000', label = 'Dispossessed')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(-0.2, 1.09), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=4, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-
-                if player or selected_team:
-                    st.pyplot(fig)
-
-            else:
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-                pitch.scatter(goal['x'], goal['y'], s=120, c='#06402b', edgecolors='#00ff00', label='Goal', marker = 'football', ax=ax)
-                pitch.scatter(shot_saved['x'], shot_saved['y'], s=120, c='#ff7c60', edgecolors='#000000', label='Saved/Blocked Shot', marker = 'football', ax=ax)
-                pitch.scatter(shot_post['x'], shot_post['y'], s=120, c='w', edgecolors='#000000', label='Shot Off Woodwork', marker = 'football', ax=ax)
-                pitch.scatter(shot_miss['x'], shot_miss['y'], s=120, c='r', edgecolors='#000000', label='Shot Off Target', marker = 'football', ax=ax)
-
-                pitch.lines(assist.x, assist.y, assist.end_x, assist.end_y, color='#00ff00', comet = True, lw = 2.5, ax=ax, label='Assist')
-                ax.scatter(assist['end_y'], assist['end_x'], s=50, c='black', edgecolor='#00ff00')
-
-                pitch.lines(chance.x, chance.y, chance.end_x, chance.end_y, color='#ffea00', comet = True, lw = 2.5, ax=ax, label='Key Pass')
-                ax.scatter(chance['end_y'], chance['end_x'], s=50, c='black', edgecolor='#ffea00')
-
-                plt.scatter(succ_dribble['y'], succ_dribble['x'], s= 200, c = '#009afd', marker = '*', edgecolor = '#000000', label = 'Dribble')
-                plt.scatter(foul_won['y'], foul_won['x'], s= 120, c = '#008000', marker = 'X', edgecolor = '#000000', label = 'Foul Won')
-                plt.scatter(foul_committed['y'], foul_committed['x'], s= 120, c = '#c21919', marker = 'X', edgecolor = '#000000', label = 'Foul Committed')
-                plt.scatter(aerial_won['y'], aerial_won['x'], s = 100, c = '#008000', marker = '^', edgecolor = '#000000', label = 'Aerial Won')
-                plt.scatter(aerial_lost['y'], aerial_lost['x'], s = 100, c = '#c21919', marker = '^', edgecolor = '#000000', label = 'Aerial Lost')
-                plt.scatter(dispossessed['y'], dispossessed['x'], s = 100, c = '#cb0000', marker = 'p', edgecolor = '#000000', label = 'Dispossessed')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(-0.2, 1.09), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=4, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-
-                if player or selected_team:
-                    st.pyplot(fig)                  
-                
-        if action_filter == "DEFENSIVE ACTIONS":
-            goal = filtered_data[filtered_data['typeId'] == 16]
-            passes = filtered_data[filtered_data['typeId'] == 1]
-
-            qualifier_columns = [col for col in goal.columns if col.startswith('qualifier/') and col.endswith('/value')]
-
-            if qualifier_columns:
-                own_goal = goal[goal[qualifier_columns].apply(lambda row: 'OWN_GOAL' in row.values, axis=1)]
-            else:
-                own_goal = pd.DataFrame()
-
-            # Ensure x and y exist to prevent KeyError
-            if own_goal.empty or 'x' not in own_goal.columns or 'y' not in own_goal.columns:
-                own_goal = pd.DataFrame({'x': [], 'y': []})  # Empty DataFrame to prevent errors
-                
-            recovery = filtered_data[filtered_data['typeId'] == 49]
-            offside = filtered_data[filtered_data['typeId'] == 55]
-            shield = filtered_data[filtered_data['typeId'] == 56]
-              
-            tackle = filtered_data[filtered_data['typeId'] == 7]
-            succ_tackle = tackle[tackle['outcome'] == 1]
-                
-            interception = filtered_data[filtered_data['typeId'] == 8]
-            block = filtered_data[filtered_data['typeId'] == 10]
-            clearance = filtered_data[filtered_data['typeId'] == 12]
-                
-            foul = filtered_data[filtered_data['typeId'] == 4]
-            foul_won = foul[foul['outcome'] == 1]
-            foul_committed = foul[foul['outcome'] == 0]
-                
-            aerial = filtered_data[filtered_data['typeId'] == 44]
-            aerial_won = aerial[aerial['outcome'] == 1]
-            aerial_lost = aerial[aerial['outcome'] == 0]
-
-            dispossessed = filtered_data[filtered_data['typeId'] == 50]
-
-            dribbled_past = filtered_data[filtered_data['typeId'] == 45]
-               
-            pickup = filtered_data[filtered_data['typeId'] == 52]
-            punch = filtered_data[filtered_data['typeId'] == 41]
-
-            if player_position == 'Goalkeeper':
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-                plt.scatter(block['y'], block['x'], s = 200, c = '#00ff00', marker = '*', edgecolor = '#000000', label ='Save')
-                plt.scatter(punch['y'], punch['x'], s = 100, c = '#ffec00', marker = 'o', edgecolor = '#000000', label = 'Punch')
-                plt.scatter(pickup['y'], pickup['x'], s = 120, c = '#dd571c', marker = '+', edgecolor = '#000000', label = 'Pick-Up')
-                plt.scatter(tackle['y'], tackle['x'], s= 130,c = '#bebebe', marker = 'H', edgecolor = '#000000', label = 'Tackle')
-                plt.scatter(recovery['y'], recovery['x'], s= 130, c = '#fcd200', marker = 'H', edgecolor = '#000000', label = 'Ball Recovery')
-                plt.scatter(interception['y'], interception['x'], s = 130, c = '#ff007f', marker = 'H', edgecolor = '#000000', label = 'Interception')
-                plt.scatter(shield['y'], shield['x'], s = 50, c = '#dd571c', marker = 'D', edgecolor = '#000000', label = 'Shielding Ball Out')
-                plt.scatter(foul_won['y'], foul_won['x'], s= 120, c = '#008000', marker = 'X', edgecolor = '#000000', label = 'Foul Won')
-                plt.scatter(foul_committed['y'], foul_committed['x'], s= 120, c = '#c21919', marker = 'X', edgecolor = '#000000', label = 'Foul Committed')
-                plt.scatter(dispossessed['y'], dispossessed['x'], s = 100, c = '#cb0000', marker = 'p', edgecolor = '#000000', label = 'Dispossessed')
-                plt.scatter(dribbled_past['y'], dribbled_past['x'], s = 50, c = '#cb0000', marker = 'x', edgecolor = '#000000', label = 'Dribbled Past')
-                plt.scatter(own_goal['x'], own_goal['y'], s=120, c='red', edgecolor='orange', label='Own Goal')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(-0.13, 1.09), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=4, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-                    
-                if player or selected_team:
-                    st.pyplot(fig)
-
-            else:
-                de = pitch.kdeplot(passes.x, passes.y, ax=ax, shade=True, shade_lowest=False, alpha=0.4, n_levels=10, cmap='magma')
-                plt.scatter(tackle['y'], tackle['x'], s= 130,c = '#bebebe', marker = 'H', edgecolor = '#000000', label = 'Tackle')
-                plt.scatter(recovery['y'], recovery['x'], s= 130, c = '#fcd200', marker = 'H', edgecolor = '#000000', label = 'Ball Recovery')
-                plt.scatter(block['y'], block['x'], s = 130, c = 'cyan', marker = 'H', edgecolor = '#000000', label ='Block') #009afd
-                plt.scatter(interception['y'], interception['x'], s = 130, c = '#ff007f', marker = 'H', edgecolor = '#000000', label = 'Interception')
-                plt.scatter(clearance['y'], clearance['x'], s = 100, c = '#9999ff', marker = 'x', edgecolor = '#000000', label = 'Clearance')
-                plt.scatter(offside['y'], offside['x'], s= 120, c = '#fcd200', marker = 'P', edgecolor = '#000000', label = 'Offside Provoked')
-                plt.scatter(shield['y'], shield['x'], s = 50, c = '#dd571c', marker = 'D', edgecolor = '#000000', label = 'Shielding Ball Out')
-                plt.scatter(foul_won['y'], foul_won['x'], s= 120, c = '#008000', marker = 'X', edgecolor = '#000000', label = 'Foul Won')
-                plt.scatter(foul_committed['y'], foul_committed['x'], s= 120, c = '#c21919', marker = 'X', edgecolor = '#000000', label = 'Foul Committed')
-                plt.scatter(aerial_won['y'], aerial_won['x'], s = 100, c = '#008000', marker = '^', edgecolor = '#000000', label = 'Aerial Won')
-                plt.scatter(aerial_lost['y'], aerial_lost['x'], s = 100, c = '#c21919', marker = '^', edgecolor = '#000000', label = 'Aerial Lost')
-                plt.scatter(dispossessed['y'], dispossessed['x'], s = 100, c = '#cb0000', marker = 'p', edgecolor = '#000000', label = 'Dispossessed')
-                plt.scatter(dribbled_past['y'], dribbled_past['x'], s = 50, c = '#cb0000', marker = 'x', edgecolor = '#000000', label = 'Dribbled Past')
-                plt.scatter(own_goal['x'], own_goal['y'], s=120, c='red', edgecolor='orange', label='Own Goal')
-
-                ax.legend(loc='upper left', bbox_to_anchor=(-0.17, 1.12), facecolor = 'black', labelcolor = 'white', prop = {'size': 10}, framealpha=0.5, ncol=4, edgecolor='#ffffff')
-
-                endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-                plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-
-                if player or selected_team:
-                    st.pyplot(fig)
-
-        if action_filter == "CONVEX HULL":
-                # Filter data and scatter plot
-            filtered = filtered_data[~filtered_data['typeId'].isin([2, 17, 18, 19, 43])]
-            pitch.scatter(filtered.x, filtered.y, color='#00FF00', s=80, edgecolors='#FFFFFF', linewidth=1, ax=ax)
-
-            pitch.scatter(filtered.x, filtered.y, color='#00FF00', s=80, edgecolors='#FFFFFF', linewidth=1, ax=ax)
-
-                # Creating an array of (x, y) coordinates for convex hull calculation
-            points = np.column_stack((filtered.x, filtered.y))
-
-                # Calculate the convex hull of the data points
-            hull1 = pitch.convexhull(filtered.x, filtered.y)
-            hull = ConvexHull(points)
-
-                # Plot the edges of the convex hull
-            for simplex in hull.simplices:
-                pitch.plot(filtered.x.iloc[simplex], filtered.y.iloc[simplex], color='#00FFFF', linewidth=3, linestyle='dashed', ax=ax)
-
-                # Create a polygon from the convex hull with a semi-transparent fill
-            polygon = pitch.polygon(hull1, color='#00FFFF', alpha=0.2, ax=ax)
-
-            endnote = "Made by Rishav. Data Source: OPTA. Built Using: Python and Streamlit."
-            plt.figtext(0.515, 0.115, endnote, ha="center", va="top", fontsize=13, color="white")
-
-            if player or selected_team:
-                st.pyplot(fig)
+            if col6.button("TEAM TERRITORY"):
+                st.session_state.action_filter = "TEAM TERRITORY"
+
+            action_filter = st.session_state.action_filter
+
+            window = None
+            if action_filter in ACTION_FILTERS:
+                # Slicing by time uses the match's cached timeline, so moving the slider never re-reads the match.
+                timeline = load_timeline(file_path)
+                with st.expander("Time Window"):
+                    period = st.radio("Period -", timeline.period_names(), horizontal=True)
+                    start, end = st.slider("Minutes -", 0, timeline.last_minute, (0, timeline.last_minute))
+                    moments = dict(timeline.moments())
+                    cuts = [None] + [(rank, after) for rank in moments for after in (False, True)]
+                    cut = st.selectbox("Before / After -", cuts, format_func=lambda c: "Whole Window" if c is None else
+                                       f"{'After' if c[1] else 'Before'} {moments[c[0]]}")
+                    window = timeline.window(start, None if end == timeline.last_minute else end, period,
+                                             *(cut if cut else (None, False)))
+                    st.dataframe(pd.DataFrame(timeline.counts(window)).T)
+
+            if player and action_filter in ACTION_FILTERS and render_mode == "Interactive":
+                from interactive_views import match_chart
+
+                with instrumentation.span('interactive_chart'):
+                    frame, chart = match_chart(file_path, player, action_filter, window)
+                    st.vega_lite_chart(frame, chart, theme=None)
+                st.download_button("Download Image", lambda: render_view(file_path, selected_team, player, action_filter, window),
+                                   file_name=f"{selected_match} - {player} - {action_filter}.png", mime="image/png")
+            elif action_filter in TEAM_VIEWS:
+                # All starters of the selected team at once, drawn as a single image.
+                with instrumentation.span('render_view'):
+                    png = render_team_view(file_path, selected_team)
+                with instrumentation.span('st.image'):
+                    st.image(png, width="stretch")
+                st.dataframe(summary(load_territories(file_path), load_starters(file_path).get(selected_team, ())), hide_index=True)
+            elif player and action_filter in ACTION_FILTERS:
+                with instrumentation.span('render_view'):
+                    png = render_view(file_path, selected_team, player, action_filter, window)
+                with instrumentation.span('st.image'):
+                    st.image(png, width="stretch")
 
     else:
         st.error(f"File {selected_match}.csv not found.")
 else:
     st.warning("No match files found in the 'Matches' folder.")
+
+show_debug()
@@ -0,0 +1,125 @@
+"""Convex-hull territory of each player: where they were on the ball, how much pitch that
+covers and where its centre is.
+
+match_territories() filters a match once, groups the points of every player in one sort
+and builds each player's Territory from its slice. Besides the full hull there is a
+trimmed hull over the share of points closest to the player's median position, which
+leaves out the odd long throw or clearance, with its own area and centroid. Players with fewer than three distinct
+points, or whose points lie on a line, have no hull and an area of 0.
+"""
+import numpy as np
+from scipy.spatial import ConvexHull, QhullError
+
+from cache import read_only
+
+# Substitutions, cards and similar events carry no meaningful position.
+EXCLUDED_TYPES = [2, 17, 18, 19, 43]
+TRIM_KEEP = 0.8
+# Opta units are percentages of a 105 x 68 m pitch.
+METRES = np.array([1.05, 0.68])
+
+
+def hull_vertices(points):
+    """Hull corners in order, or None when the points span no area."""
+    if len(points) < 3 or len(np.unique(points, axis=0)) < 3:
+        return None
+    try:
+        return points[ConvexHull(points).vertices]
+    except QhullError:
+        return None
+
+
+def trim(points, keep=TRIM_KEEP):
+    """The share `keep` of the points closest to their median position."""
+    n = int(np.ceil(len(points) * keep))
+    if n >= len(points):
+        return points
+    distances = np.hypot(*((points - np.median(points, axis=0)) * METRES).T)
+    return points[np.argpartition(distances, n - 1)[:n]]
+
+
+def polygon_stats(vertices):
+    """(area in square metres, centroid in opta units) of a polygon given by its corners."""
+    metres = vertices * METRES
+    x, y = metres[:, 0], metres[:, 1]
+    x1, y1 = np.roll(x, -1), np.roll(y, -1)
+    cross = x * y1 - x1 * y
+    area = cross.sum() / 2
+    if area == 0:
+        return 0.0, vertices.mean(axis=0)
+    centroid = np.array([((x + x1) * cross).sum(), ((y + y1) * cross).sum()]) / (6 * area)
+    return abs(float(area)), centroid / METRES
+
+
+class Territory:
+    def __init__(self, points, keep=TRIM_KEEP):
+        self.points = points
+        self.hull = hull_vertices(points)
+        self.trimmed = hull_vertices(trim(points, keep)) if keep < 1 else self.hull
+        if self.hull is None:
+            self.area = 0.0
+            self.centroid = points.mean(axis=0) if len(points) else None
+        else:
+            self.area, self.centroid = polygon_stats(self.hull)
+        if self.trimmed is None:
+            self.trimmed_area, self.trimmed_centroid = 0.0, self.centroid
+        else:
+            self.trimmed_area, self.trimmed_centroid = polygon_stats(self.trimmed)
+        read_only(self.points, self.hull, self.trimmed, self.centroid, self.trimmed_centroid)
+
+    @classmethod
+    def from_events(cls, rows, keep=TRIM_KEEP):
+        """Territory of one player's event rows (any frame with typeId, x and y)."""
+        rows = rows[~rows['typeId'].isin(EXCLUDED_TYPES)]
+        points = rows[['x', 'y']].dropna().to_numpy(dtype='float64')
+        return cls(points, keep)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.points, self.hull, self.trimmed) if a is not None)
+
+
+def match_territories(df, keep=TRIM_KEEP):
+    """{player name: Territory} for every player of a match."""
+    rows = df[~df['typeId'].isin(EXCLUDED_TYPES) & df['playerName'].notna() & df['x'].notna() & df['y'].notna()]
+    names = rows['playerName'].astype('category')
+    codes = names.cat.codes.to_numpy()
+    order = np.argsort(codes, kind='stable')
+    points = rows[['x', 'y']].to_numpy(dtype='float64')[order]
+    starts = np.flatnonzero(np.r_[True, np.diff(codes[order]) != 0])
+    territories = {}
+    for start, stop in zip(starts, np.r_[starts[1:], len(order)]):
+        player = names.cat.categories[codes[order[start]]]
+        territories[player] = Territory(points[start:stop], keep)
+    return territories
+
+
+def starters(df, team):
+    """Players of the team who appear in the match without coming on as a substitute (typeId 19)."""
+    team_rows = df[(df['teamName'] == team) & df['playerName'].notna()]
+    came_on = set(team_rows.loc[team_rows['typeId'] == 19, 'playerName'])
+    return [player for player in team_rows['playerName'].unique() if player not in came_on]
+
+
+def match_starters(df):
+    """{team: tuple of starters} for every team of a match, from one pass over the rows."""
+    rows = df[df['teamName'].notna() & df['playerName'].notna()]
+    came_on = set(zip(rows.loc[rows['typeId'] == 19, 'teamName'], rows.loc[rows['typeId'] == 19, 'playerName']))
+    result = {}
+    for team, player in rows[['teamName', 'playerName']].drop_duplicates().itertuples(index=False):
+        if (team, player) not in came_on:
+            result.setdefault(team, []).append(player)
+    return {team: tuple(players) for team, players in result.items()}
+
+
+def summary(territories, players=None):
+    """Rows of (player, hull area m², trimmed area m², centroid x, centroid y) for a table."""
+    rows = []
+    for player in players if players is not None else territories:
+        t = territories.get(player)
+        if t is None:
+            continue
+        cx, cy = t.centroid if t.centroid is not None else (np.nan, np.nan)
+        rows.append({'Player': player, 'Area (m²)': round(t.area), f'{int(TRIM_KEEP * 100)}% Area (m²)': round(t.trimmed_area),
+                     'Centroid x': round(float(cx), 1), 'Centroid y': round(float(cy), 1)})
+    return rows
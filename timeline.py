@@ -0,0 +1,161 @@
+"""Events of one match in game-clock order, for slicing views by time.
+
+Timeline ranks every event by period and clock (timeMin, timeSec), so any time window is
+a set of rank ranges found by binary search: one range per period for a minute window,
+plus an optional cut before or after a goal or substitution. EventIndex keeps each of
+its blocks in the same order, so a player's rows inside a window are found by binary
+search as well. Per-team, per-category prefix counts give the number of events in a
+window without touching the rows.
+"""
+import numpy as np
+
+from cache import read_only
+
+# Opta periods in the order they happen; 16 is pre-match, 10 half time, 14 post-match.
+PERIOD_ORDER = [16, 1, 10, 2, 3, 4, 5, 14]
+PERIODS = {
+    "Full Match": None,
+    "First Half": [1],
+    "Second Half": [2],
+    "Extra Time": [3, 4],
+}
+# Counted in the window summary: name -> typeIds.
+CATEGORIES = {
+    'Passes': [1],
+    'Shots': [13, 14, 15, 16],
+    'Tackles': [7],
+    'Interceptions': [8],
+    'Recoveries': [49],
+}
+# Pre-match, half-time and post-match events are all stamped 0:00, so minute windows leave them out.
+PLAY_PERIODS = [1, 2, 3, 4, 5]
+GOAL = 16
+SUB_ON = 19
+
+
+def clock_order(df):
+    """Row positions sorted by period, then clock; rows at the same time keep their file order."""
+    period = df['periodId'].to_numpy()
+    # Periods outside PERIOD_ORDER go last.
+    period_rank = np.full(len(df), len(PERIOD_ORDER), dtype='int64')
+    for position, period_id in enumerate(PERIOD_ORDER):
+        period_rank[period == period_id] = position
+    clock = df['timeMin'].to_numpy().astype('int64') * 60 + df['timeSec'].to_numpy().astype('int64')
+    return np.lexsort((clock, period_rank)).astype('int32')
+
+
+def _ranks(order):
+    """Inverse of a permutation: the timeline position of each row."""
+    ranks = np.empty(len(order), dtype='int32')
+    ranks[order] = np.arange(len(order), dtype='int32')
+    return ranks
+
+
+def intersect(ranges, other):
+    """Overlap of two sorted lists of [start, stop) ranges."""
+    result = []
+    for start, stop in ranges:
+        for other_start, other_stop in other:
+            lo, hi = max(start, other_start), min(stop, other_stop)
+            if lo < hi:
+                result.append((lo, hi))
+    return result
+
+
+class Timeline:
+    def __init__(self, df, order=None):
+        self.df = df
+        self.order = clock_order(df) if order is None else order
+        self.ranks = _ranks(self.order)
+        self.period = df['periodId'].to_numpy()[self.order]
+        self.clock = (df['timeMin'].to_numpy().astype('int32') * 60 + df['timeSec'].to_numpy())[self.order]
+        self.n = len(df)
+        self._periods = {}
+        # Periods are contiguous on the timeline; keep them in game order.
+        starts = np.flatnonzero(np.r_[True, self.period[1:] != self.period[:-1]]) if self.n else []
+        for start, stop in zip(starts, np.r_[starts[1:], self.n] if self.n else []):
+            self._periods[int(self.period[start])] = (int(start), int(stop))
+
+        # One column per (team, category); row i holds the counts of the first i events.
+        self.teams = list(df['teamName'].cat.categories)
+        team = df['teamName'].cat.codes.to_numpy()[self.order]
+        type_id = df['typeId'].to_numpy()[self.order]
+        columns = [(team == t) & np.isin(type_id, ids) for t in range(len(self.teams)) for ids in CATEGORIES.values()]
+        self.prefix = np.zeros((self.n + 1, len(columns)), dtype='int32')
+        if columns:
+            np.cumsum(np.column_stack(columns), axis=0, out=self.prefix[1:])
+        read_only(self.order, self.ranks, self.period, self.clock, self.prefix)
+        self._moments = None
+
+    @property
+    def last_minute(self):
+        return int(self.clock.max()) // 60 + 1 if self.n else 0
+
+    def period_names(self):
+        """The names of PERIODS that have events in this match."""
+        return [name for name, ids in PERIODS.items() if ids is None or any(p in self._periods for p in ids)]
+
+    def ranges(self, start_minute=0, end_minute=None, period=None):
+        """[start, stop) rank ranges of events from start_minute up to end_minute, one per period."""
+        ids = PERIODS.get(period)
+        start_clock = start_minute * 60
+        stop_clock = None if end_minute is None else end_minute * 60
+        result = []
+        if ids is None and (start_minute > 0 or end_minute is not None):
+            ids = PLAY_PERIODS
+        for period_id, (first, last) in self._periods.items():
+            if ids is not None and period_id not in ids:
+                continue
+            clock = self.clock[first:last]
+            lo = first + int(np.searchsorted(clock, start_clock, side='left'))
+            hi = last if stop_clock is None else first + int(np.searchsorted(clock, stop_clock, side='left'))
+            if lo >= hi:
+                continue
+            # Neighbouring periods join up, so the whole match is the single range (0, n).
+            if result and result[-1][1] == lo:
+                result[-1] = (result[-1][0], hi)
+            else:
+                result.append((lo, hi))
+        return result
+
+    def moments(self):
+        """(rank, label) of every goal and substitution, in game order; built once per match."""
+        if self._moments is None:
+            self._moments = tuple(self._find_moments())
+        return self._moments
+
+    def _find_moments(self):
+        rows = self.order[np.isin(self.df['typeId'].to_numpy()[self.order], [GOAL, SUB_ON])]
+        moments = []
+        for row in rows.tolist():
+            event = self.df.iloc[row]
+            if event['typeId'] == GOAL:
+                kind = "Own Goal" if event['own_goal'] else "Goal"
+                label = f"{kind}: {event['playerName']}"
+            else:
+                label = f"Sub On: {event['playerName']}"
+            moments.append((int(self.ranks[row]), f"{event['timeMin']}:{event['timeSec']:02d} {label} ({event['teamName']})"))
+        return moments
+
+    def window(self, start_minute=0, end_minute=None, period=None, moment=None, after=False):
+        """A hashable window for EventIndex, or None when it covers the whole match.
+
+        moment is a rank from moments(); the window keeps what happened before it, or after it.
+        """
+        ranges = self.ranges(start_minute, end_minute, period)
+        if moment is not None:
+            ranges = intersect(ranges, [(moment + 1, self.n)] if after else [(0, moment)])
+        if ranges == [(0, self.n)]:
+            return None
+        return tuple(ranges)
+
+    def counts(self, window):
+        """{team: {category: events in the window}} from the prefix counts."""
+        ranges = [(0, self.n)] if window is None else window
+        totals = sum((self.prefix[hi] - self.prefix[lo] for lo, hi in ranges), np.zeros(self.prefix.shape[1], dtype='int32'))
+        totals = totals.reshape(len(self.teams), len(CATEGORIES))
+        return {team: dict(zip(CATEGORIES, row.tolist())) for team, row in zip(self.teams, totals)}
+
+    @property
+    def nbytes(self):
+        return self.order.nbytes + self.ranks.nbytes + self.period.nbytes + self.clock.nbytes + self.prefix.nbytes